@@ -1,13 +1,57 @@
+import json
+import os
+import time
 import bittensor as bt
 import requests
 from binascii import hexlify
 
 API_BASE = "https://api.agentbuilder80.com"
+AUTH_MESSAGE = "I want to use Agent Builder API"
+
+# Opt-in: set AGENTBUILDER_CACHE_AUTH=1 to cache the signature over AUTH_MESSAGE
+# so the coldkey isn't unlocked every run. The cached signature is a reusable
+# credential, so it is kept owner-readable only and expires after
+# AGENTBUILDER_AUTH_CACHE_TTL seconds (default 1 hour).
+AUTH_CACHE_ENABLED = os.getenv("AGENTBUILDER_CACHE_AUTH", "").lower() in ("1", "true", "yes")
+AUTH_CACHE_PATH = os.path.expanduser("~/.cache/agentbuilder80/auth.json")
+AUTH_CACHE_MAX_AGE = int(os.getenv("AGENTBUILDER_AUTH_CACHE_TTL", str(60 * 60)))
+
+
+def _load_cached_signature(wallet_name: str):
+    """Return (coldkey, signature_hex) from the cache, or None if missing/stale."""
+    try:
+        with open(AUTH_CACHE_PATH) as f:
+            entry = json.load(f).get(wallet_name)
+    except (OSError, ValueError):
+        return None
+    
+    if not entry or time.time() - entry.get("ts", 0) > AUTH_CACHE_MAX_AGE:
+        return None
+    return entry["coldkey"], entry["signature"]
+
+
+def _save_cached_signature(wallet_name: str, coldkey: str, signature_hex: str):
+    """Write the signature to the cache file (readable by the owner only)."""
+    try:
+        with open(AUTH_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    
+    cache[wallet_name] = {"coldkey": coldkey, "signature": signature_hex, "ts": time.time()}
+    os.makedirs(os.path.dirname(AUTH_CACHE_PATH), exist_ok=True)
+    fd = os.open(AUTH_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(cache, f)
+
 
 def generate_auth_headers(wallet_name: str, password: str = None) -> dict:
     """
     Generate authentication headers for API requests.
     
+    With AGENTBUILDER_CACHE_AUTH=1 the signature is cached on disk for
+    AUTH_CACHE_MAX_AGE, so later runs skip loading and unlocking the wallet.
+    
     Args:
         wallet_name: Your Bittensor wallet name
         password: Wallet password (optional if already unlocked)
@@ -15,17 +59,23 @@ def generate_auth_headers(wallet_name: str, password: str = None) -> dict:
     Returns:
         Dictionary with headers ready to use
     """
-    # Load wallet
-    wallet = bt.wallet(name=wallet_name)
-    if password:
-        wallet.coldkey_file.save_password_to_env(password)
-    wallet.unlock_coldkey()
-    
-    # Sign ANY message (you can reuse this!)
-    coldkey = wallet.coldkey.ss58_address
-    message = "I want to use Agent Builder API"
-    signature = wallet.coldkey.sign(message.encode())
-    signature_hex = hexlify(signature).decode()
+    message = AUTH_MESSAGE
+    cached = _load_cached_signature(wallet_name) if AUTH_CACHE_ENABLED else None
+    if cached:
+        coldkey, signature_hex = cached
+    else:
+        # Load wallet
+        wallet = bt.wallet(name=wallet_name)
+        if password:
+            wallet.coldkey_file.save_password_to_env(password)
+        wallet.unlock_coldkey()
+        
+        # Sign ANY message (you can reuse this!)
+        coldkey = wallet.coldkey.ss58_address
+        signature = wallet.coldkey.sign(message.encode())
+        signature_hex = hexlify(signature).decode()
+        if AUTH_CACHE_ENABLED:
+            _save_cached_signature(wallet_name, coldkey, signature_hex)
     
     # Get coldkey address
     # coldkey = "5EPjbb5nmV9MuvEGNBJa3EUEGHpTdWLAHcmiSDbTnBEJyKnU"
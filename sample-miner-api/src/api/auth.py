@@ -1,5 +1,6 @@
 """Authentication middleware and utilities for the miner API."""
 
+import hmac
 import logging
 from fastapi import Security, HTTPException, status
 from fastapi.security.api_key import APIKeyHeader
@@ -33,10 +34,6 @@ async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
             headers={"WWW-Authenticate": "ApiKey"},
         )
     
-    expected_key = settings.get_api_key
-    
-    # Use constant-time comparison to prevent timing attacks
-    import hmac
     if not api_key:
         logger.warning("Invalid API key attempted (empty)")
         raise HTTPException(
@@ -44,8 +41,8 @@ async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
             detail="Invalid API key",
         )
     
-    # Constant-time comparison using hmac.compare_digest
-    if not hmac.compare_digest(api_key.encode('utf-8'), expected_key.encode('utf-8')):
+    # Constant-time comparison against the pre-encoded key to prevent timing attacks
+    if not hmac.compare_digest(api_key.encode('utf-8'), settings.api_key_bytes):
         logger.warning("Invalid API key attempted")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -66,4 +63,4 @@ async def optional_api_key(api_key: str = Security(api_key_header)) -> bool:
     if api_key is None:
         return False
     
-    return api_key == settings.get_api_key
+    return hmac.compare_digest(api_key.encode('utf-8'), settings.api_key_bytes)
@@ -35,16 +35,29 @@ ARCHITECTURE:
 - Auto cleanup: Old messages removed automatically
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import Optional, List, Dict
 from datetime import datetime
+import atexit
+import json
 import logging
+import queue
 import asyncio
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager, suppress
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 from src.models.models import (
     ComponentInput, ComponentOutput, InputItem, PreviousOutput
 )
@@ -64,19 +77,147 @@ from src.services.components import (
     component_aggregate
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+# Configure logging. Request handlers only put records on a queue; a
+# background thread formats and writes them, so slow stdout never blocks the
+# event loop. The listener starts with the handler, so records are drained
+# even when the app is imported without running lifespan.
+_log_queue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
-)
+))
+_log_queue_handler = QueueHandler(_log_queue)
+# Only merge args into the message here; the full format is applied by the listener
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_log_queue_handler])
+log_listener = QueueListener(_log_queue, _log_stream_handler, respect_handler_level=True)
+log_listener.start()
+# Flush queued log records before the process exits
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Maximum accepted request body size
+MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB limit
+
+# Methods that carry no request body and skip the size check
+BODYLESS_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Initialize rate limiter (counters live in settings.rate_limit_storage_uri,
+# e.g. Redis, so limits hold across workers)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.rate_limit_storage_uri,
+    strategy=settings.rate_limit_strategy
+)
+
+
+async def _init_redis():
+    """Initialize Redis for parent/child miners (non-fatal on failure)."""
+    if settings.miner_type not in ["parent", "child"]:
+        logger.info("   Redis not required for normal miner")
+        return
+    
+    from src.services.redis_service import initialize_redis
+    try:
+        await initialize_redis()
+        logger.info("✅ Redis initialized for %s miner", settings.miner_type)
+    except Exception as e:
+        logger.warning("⚠️ Redis initialization failed: %s", e)
+        logger.warning("   %s miner will not function properly without Redis", settings.miner_type.capitalize())
+
+
+async def _init_database():
+    """Create database tables off the event loop."""
+    try:
+        await asyncio.to_thread(create_db_and_tables)
+        logger.info("✅ Database initialized successfully")
+    except Exception as e:
+        logger.error("❌ Failed to initialize database: %s", e)
+        raise
+
+
+async def _maintain_database_periodically():
+    """Bound the SQLite WAL file and keep planner statistics fresh."""
+    from src.core.database import (
+        CHECKPOINT_INTERVAL, OPTIMIZE_INTERVAL, maybe_checkpoint, optimize_database, run_db
+    )
+    loop = asyncio.get_running_loop()
+    next_optimize = loop.time() + OPTIMIZE_INTERVAL
+    while True:
+        await asyncio.sleep(CHECKPOINT_INTERVAL)
+        await run_db(maybe_checkpoint)
+        if loop.time() >= next_optimize:
+            await run_db(optimize_database)
+            next_optimize = loop.time() + OPTIMIZE_INTERVAL
+
+
+async def _close_redis():
+    """Close the Redis connection if this miner uses one."""
+    if settings.miner_type in ["parent", "child"]:
+        from src.services.redis_service import close_redis
+        await close_redis()
+        logger.info("✅ Redis connection closed")
+
+
+async def _close_llm_client():
+    """Close the shared LLM HTTP client."""
+    from src.services.llm_client import close_llm_client
+    await close_llm_client()
+    logger.info("✅ LLM client closed")
+
+
+async def _close_google_search_client():
+    """Close the shared Google search HTTP client."""
+    from src.services.components import close_google_search_client
+    await close_google_search_client()
+    logger.info("✅ Google search client closed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize resources on startup and release them on shutdown."""
+    logger.info("🚀 Starting up Sample Miner API...")
+    logger.info("   Miner Type: %s", settings.miner_type)
+    # Database and Redis setup are independent, so run them concurrently
+    await asyncio.gather(_init_database(), _init_redis())
+    maintenance_task = asyncio.create_task(_maintain_database_periodically())
+    
+    yield
+    
+    logger.info("🛑 Shutting down Sample Miner API...")
+    maintenance_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await maintenance_task
+    try:
+        # Finish Redis writes that were handed off to background tasks
+        from src.services.components import wait_for_background_tasks
+        await wait_for_background_tasks()
+        
+        results = await asyncio.gather(
+            _close_redis(), _close_llm_client(), _close_google_search_client(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("❌ Error during shutdown: %s", result)
+        
+        # Close database connections. A checkpoint/optimize call already
+        # running on the database thread isn't interrupted by the cancel, so
+        # let it finish before the sync engine is disposed.
+        from src.core.database import engine, async_engine, async_read_engine, run_db
+        await run_db(lambda: None)
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+        engine.dispose()
+        logger.info("✅ Database connections closed")
+    except Exception as e:
+        logger.error("❌ Error during shutdown: %s", e)
+
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Sample Miner API - Unified Component Interface",
     description="A unified component interface with conversation history (max 10 messages, auto-cleanup after 1 week). All components use the same input/output pattern.",
     docs_url="/docs",
@@ -87,6 +228,10 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Compress JSON responses (component outputs, conversation history, playbooks);
+# their repeated keys shrink well even at a few hundred bytes
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -97,63 +242,26 @@ app.add_middleware(
 )
 
 
-# Startup event to initialize database
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database tables on startup."""
-    logger.info("🚀 Starting up Sample Miner API...")
-    logger.info(f"   Miner Type: {settings.miner_type}")
-    try:
-        create_db_and_tables()
-        logger.info("✅ Database initialized successfully")
-        
-        # Initialize Redis if not running as normal miner
-        if settings.miner_type in ["parent", "child"]:
-            from src.services.redis_service import initialize_redis
-            try:
-                await initialize_redis()
-                logger.info(f"✅ Redis initialized for {settings.miner_type} miner")
-            except Exception as e:
-                logger.warning(f"⚠️ Redis initialization failed: {e}")
-                logger.warning(f"   {settings.miner_type.capitalize()} miner will not function properly without Redis")
-        else:
-            logger.info("   Redis not required for normal miner")
-            
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize database: {e}")
-        raise
-
-
-# Shutdown event to cleanup resources
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup resources on shutdown."""
-    logger.info("🛑 Shutting down Sample Miner API...")
-    try:
-        # Close Redis connection
-        if settings.miner_type in ["parent", "child"]:
-            from src.services.redis_service import close_redis
-            await close_redis()
-            logger.info("✅ Redis connection closed")
-        
-        # Close database connections
-        from src.core.database import engine
-        engine.dispose()
-        logger.info("✅ Database connections closed")
-    except Exception as e:
-        logger.error(f"❌ Error during shutdown: {e}")
-
-
 # Request size limit middleware
 @app.middleware("http")
 async def limit_request_size(request: Request, call_next):
     """Limit request body size to prevent memory exhaustion attacks."""
-    MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB limit
+    if request.method in BODYLESS_METHODS:
+        return await call_next(request)
     
-    if request.headers.get("content-length"):
-        content_length = int(request.headers.get("content-length"))
+    content_length_header = request.headers.get("content-length")
+    if content_length_header:
+        try:
+            content_length = int(content_length_header)
+        except ValueError:
+            logger.warning("Invalid Content-Length header: %r", content_length_header)
+            from fastapi.responses import JSONResponse
+            return JSONResponse(
+                status_code=400,
+                content={"detail": "Invalid Content-Length header"}
+            )
         if content_length > MAX_REQUEST_SIZE:
-            logger.warning(f"Request too large: {content_length} bytes (max {MAX_REQUEST_SIZE})")
+            logger.warning("Request too large: %s bytes (max %s)", content_length, MAX_REQUEST_SIZE)
             from fastapi.responses import JSONResponse
             return JSONResponse(
                 status_code=413,
@@ -173,7 +281,7 @@ async def timeout_middleware(request: Request, call_next):
             timeout=60.0  # 60 second timeout
         )
     except asyncio.TimeoutError:
-        logger.error(f"Request timeout: {request.method} {request.url}")
+        logger.error("Request timeout: %s %s", request.method, request.url)
         from fastapi.responses import JSONResponse
         return JSONResponse(
             status_code=504,
@@ -181,49 +289,84 @@ async def timeout_middleware(request: Request, call_next):
         )
 
 
+def _encode_json(data: dict) -> bytes:
+    """Serialize a response body to JSON bytes, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
+
+
+# Static response bodies for / and /capabilities. Their content only depends
+# on settings, so they are encoded once at import instead of per request.
+ROOT_RESPONSE_BODY = _encode_json({
+    "name": "Sample Miner API",
+    "status": "running",
+    "architecture": "Unified component interface with conversation history",
+    "endpoints": {
+        "complete": "/complete - Process tasks with conversation history",
+        "refine": "/refine - Refine outputs based on previous results",
+        "feedback": "/feedback - Analyze outputs and provide feedback",
+        "human_feedback": "/human_feedback - Acknowledge user feedback",
+        "internet_search": "/internet_search - Search internet (template)",
+        "summary": "/summary - Summarize previous outputs",
+        "aggregate": "/aggregate - Majority voting on outputs"
+    },
+    "conversation_management": {
+        "list_conversations": "GET /conversations - List all conversations (requires auth)",
+        "get_conversation": "GET /conversations/{cid} - Get conversation history (requires auth)",
+        "delete_conversation": "DELETE /conversations/{cid} - Delete conversation (requires auth)"
+    },
+    "playbook_endpoints": {
+        "get_playbook": "GET /playbook/{cid} - Get playbook entries (requires auth)",
+        "get_playbook_context": "GET /playbook/{cid}/context - Get formatted playbook context (requires auth)"
+    },
+    "other_endpoints": {
+        "capabilities": "/capabilities - Get miner capabilities",
+        "health": "/health - Health check",
+        "docs": "/docs - API documentation"
+    },
+    "features": {
+        "conversation_history": "Stores max 10 recent messages per conversation",
+        "auto_cleanup": "Deletes messages older than 1 week",
+        "unified_interface": "All components use same input/output pattern"
+    }
+})
+
+CAPABILITIES_RESPONSE_BODY = _encode_json({
+    "miner_name": settings.miner_name,
+    "llm_provider": settings.llm_provider,
+    "model": settings.get_model_name,
+    "conversation_history_enabled": True,
+    "max_conversation_messages": settings.max_conversation_messages,
+    "message_retention_days": settings.conversation_cleanup_days,
+    "components": [
+        "complete",
+        "refine",
+        "feedback",
+        "human_feedback",
+        "internet_search",
+        "summary",
+        "aggregate"
+    ],
+    "features": {
+        "unified_component_interface": True,
+        "conversation_history": True,
+        "auto_message_cleanup": True,
+        "internet_search_template": True,
+        "llm_summary": True,
+        "majority_voting": True,
+        "privacy_friendly": True,
+        "multi_provider_support": True,
+        "quantized_model_friendly": True
+    }
+})
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
     logger.info("GET / - Root endpoint accessed")
-    try:
-        response = {
-            "name": "Sample Miner API",
-            "status": "running",
-            "architecture": "Unified component interface with conversation history",
-            "endpoints": {
-                "complete": "/complete - Process tasks with conversation history",
-                "refine": "/refine - Refine outputs based on previous results",
-                "feedback": "/feedback - Analyze outputs and provide feedback",
-                "human_feedback": "/human_feedback - Acknowledge user feedback",
-                "internet_search": "/internet_search - Search internet (template)",
-                "summary": "/summary - Summarize previous outputs",
-                "aggregate": "/aggregate - Majority voting on outputs"
-            },
-            "conversation_management": {
-                "list_conversations": "GET /conversations - List all conversations (requires auth)",
-                "get_conversation": "GET /conversations/{cid} - Get conversation history (requires auth)",
-                "delete_conversation": "DELETE /conversations/{cid} - Delete conversation (requires auth)"
-            },
-            "playbook_endpoints": {
-                "get_playbook": "GET /playbook/{cid} - Get playbook entries (requires auth)",
-                "get_playbook_context": "GET /playbook/{cid}/context - Get formatted playbook context (requires auth)"
-            },
-            "other_endpoints": {
-                "capabilities": "/capabilities - Get miner capabilities",
-                "health": "/health - Health check",
-                "docs": "/docs - API documentation"
-            },
-            "features": {
-                "conversation_history": "Stores max 10 recent messages per conversation",
-                "auto_cleanup": "Deletes messages older than 1 week",
-                "unified_interface": "All components use same input/output pattern"
-            }
-        }
-        logger.info("GET / - Root endpoint completed successfully")
-        return response
-    except Exception as e:
-        logger.error(f"GET / - Error in root endpoint: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.get("/health")
@@ -231,7 +374,7 @@ async def health_check():
     """Health check endpoint."""
     logger.info("GET /health - Health check endpoint accessed")
     try:
-        stats = conversation_manager.get_stats_sync()
+        stats = await conversation_manager.get_stats()
         response = {
             "status": "healthy",
             "llm_provider": settings.llm_provider,
@@ -243,58 +386,44 @@ async def health_check():
                 "playbook_system": True
             }
         }
-        logger.info(f"GET /health - Health check completed: {stats['total_conversations']} active conversations")
+        logger.info("GET /health - Health check completed: %s active conversations", stats['total_conversations'])
         return response
     except Exception as e:
-        logger.error(f"GET /health - Error in health check: {str(e)}", exc_info=True)
+        logger.error("GET /health - Error in health check: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/capabilities", dependencies=[Depends(optional_api_key)])
 async def get_capabilities():
     """Get miner capabilities and supported functions."""
-    logger.info("GET /capabilities - Capabilities endpoint accessed")
-    try:
-        response = {
-            "miner_name": settings.miner_name,
-            "llm_provider": settings.llm_provider,
-            "model": settings.get_model_name,
-            "conversation_history_enabled": True,
-            "max_conversation_messages": settings.max_conversation_messages,
-            "message_retention_days": settings.conversation_cleanup_days,
-            "components": [
-                "complete",
-                "refine",
-                "feedback",
-                "human_feedback",
-                "internet_search",
-                "summary",
-                "aggregate"
-            ],
-            "features": {
-                "unified_component_interface": True,
-                "conversation_history": True,
-                "auto_message_cleanup": True,
-                "internet_search_template": True,
-                "llm_summary": True,
-                "majority_voting": True,
-                "privacy_friendly": True,
-                "multi_provider_support": True,
-                "quantized_model_friendly": True
-            }
-        }
-        logger.info(f"GET /capabilities - Capabilities retrieved for miner: {settings.miner_name}")
-        return response
-    except Exception as e:
-        logger.error(f"GET /capabilities - Error retrieving capabilities: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("GET /capabilities - Capabilities retrieved for miner: %s", settings.miner_name)
+    return Response(content=CAPABILITIES_RESPONSE_BODY, media_type="application/json")
 
 
 # ============================================================================
 # Unified Component API Endpoints
 # ============================================================================
 
-@app.post("/complete", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+def _require_previous_outputs(component_input: ComponentInput, endpoint: str):
+    """
+    Reject requests that have nothing to work on.
+    
+    Checked before the conversation context is loaded so a degenerate request
+    costs neither a database round trip nor an LLM call.
+    
+    Args:
+        component_input: Incoming component request
+        endpoint: Endpoint path, used in the log message
+        
+    Raises:
+        HTTPException: 400 if previous_outputs is empty
+    """
+    if not component_input.previous_outputs:
+        logger.warning("POST %s - Rejected request for cid: %s: previous_outputs is empty", endpoint, component_input.cid)
+        raise HTTPException(status_code=400, detail="previous_outputs is required")
+
+
+@app.post("/complete", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("20/minute")
 async def complete_component(request: Request, component_input: ComponentInput):
     """
@@ -309,19 +438,19 @@ async def complete_component(request: Request, component_input: ComponentInput):
     
     Rate limit: 20 requests per minute per IP address.
     """
-    logger.info(f"POST /complete - Request received for cid: {component_input.cid}, task: {component_input.task}")
+    logger.info("POST /complete - Request received for cid: %s, task: %s", component_input.cid, component_input.task)
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /complete - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /complete - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_complete(component_input, context)
-        logger.info(f"POST /complete - Successfully completed task for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /complete - Successfully completed task for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /complete - Error in complete endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /complete - Error in complete endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/refine", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/refine", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("20/minute")
 async def refine_component(request: Request, component_input: ComponentInput):
     """
@@ -332,19 +461,20 @@ async def refine_component(request: Request, component_input: ComponentInput):
     
     Rate limit: 20 requests per minute per IP address.
     """
-    logger.info(f"POST /refine - Request received for cid: {component_input.cid}, task: {component_input.task}, previous_outputs count: {len(component_input.previous_outputs) if component_input.previous_outputs else 0}")
+    logger.info("POST /refine - Request received for cid: %s, task: %s, previous_outputs count: %s", component_input.cid, component_input.task, len(component_input.previous_outputs) if component_input.previous_outputs else 0)
+    _require_previous_outputs(component_input, "/refine")
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /refine - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /refine - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_refine(component_input, context)
-        logger.info(f"POST /refine - Successfully refined output for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /refine - Successfully refined output for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /refine - Error in refine endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /refine - Error in refine endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/feedback", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/feedback", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("20/minute")
 async def feedback_component(request: Request, component_input: ComponentInput):
     """
@@ -355,19 +485,20 @@ async def feedback_component(request: Request, component_input: ComponentInput):
     
     Rate limit: 20 requests per minute per IP address.
     """
-    logger.info(f"POST /feedback - Request received for cid: {component_input.cid}, task: {component_input.task}, previous_outputs count: {len(component_input.previous_outputs) if component_input.previous_outputs else 0}")
+    logger.info("POST /feedback - Request received for cid: %s, task: %s, previous_outputs count: %s", component_input.cid, component_input.task, len(component_input.previous_outputs) if component_input.previous_outputs else 0)
+    _require_previous_outputs(component_input, "/feedback")
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /feedback - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /feedback - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_feedback(component_input, context)
-        logger.info(f"POST /feedback - Successfully generated feedback for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /feedback - Successfully generated feedback for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /feedback - Error in feedback endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /feedback - Error in feedback endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/human_feedback", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/human_feedback", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("30/minute")
 async def human_feedback_component(request: Request, component_input: ComponentInput):
     """
@@ -379,19 +510,19 @@ async def human_feedback_component(request: Request, component_input: ComponentI
     Rate limit: 30 requests per minute per IP address (higher limit for feedback).
     """
     input_count = len(component_input.input) if component_input.input else 0
-    logger.info(f"POST /human_feedback - Request received for cid: {component_input.cid}, task: {component_input.task}, input items: {input_count}")
+    logger.info("POST /human_feedback - Request received for cid: %s, task: %s, input items: %s", component_input.cid, component_input.task, input_count)
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /human_feedback - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /human_feedback - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_human_feedback(component_input, context)
-        logger.info(f"POST /human_feedback - Successfully processed human feedback for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /human_feedback - Successfully processed human feedback for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /human_feedback - Error in human_feedback endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /human_feedback - Error in human_feedback endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/internet_search", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/internet_search", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("10/minute")
 async def internet_search_component(request: Request, component_input: ComponentInput):
     """
@@ -406,19 +537,19 @@ async def internet_search_component(request: Request, component_input: Component
     
     See the implementation in src/services/components.py for detailed notes.
     """
-    logger.info(f"POST /internet_search - Request received for cid: {component_input.cid}, task: {component_input.task}")
+    logger.info("POST /internet_search - Request received for cid: %s, task: %s", component_input.cid, component_input.task)
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /internet_search - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /internet_search - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_internet_search(component_input, context)
-        logger.info(f"POST /internet_search - Internet search completed for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /internet_search - Internet search completed for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /internet_search - Error in internet_search endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /internet_search - Error in internet_search endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/summary", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/summary", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("15/minute")
 async def summary_component(request: Request, component_input: ComponentInput):
     """
@@ -428,19 +559,20 @@ async def summary_component(request: Request, component_input: ComponentInput):
     a concise, comprehensive summary that captures main points and key insights.
     """
     previous_outputs_count = len(component_input.previous_outputs) if component_input.previous_outputs else 0
-    logger.info(f"POST /summary - Request received for cid: {component_input.cid}, task: {component_input.task}, previous_outputs count: {previous_outputs_count}")
+    logger.info("POST /summary - Request received for cid: %s, task: %s, previous_outputs count: %s", component_input.cid, component_input.task, previous_outputs_count)
+    _require_previous_outputs(component_input, "/summary")
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /summary - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /summary - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_summary(component_input, context)
-        logger.info(f"POST /summary - Successfully generated summary for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /summary - Successfully generated summary for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /summary - Error in summary endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /summary - Error in summary endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/aggregate", response_model=ComponentOutput, dependencies=[Depends(verify_api_key)])
+@app.post("/aggregate", response_model=ComponentOutput, response_model_exclude_none=True, dependencies=[Depends(verify_api_key)])
 @limiter.limit("15/minute")
 async def aggregate_component(request: Request, component_input: ComponentInput):
     """
@@ -450,15 +582,16 @@ async def aggregate_component(request: Request, component_input: ComponentInput)
     determines the consensus answer through majority voting logic.
     """
     previous_outputs_count = len(component_input.previous_outputs) if component_input.previous_outputs else 0
-    logger.info(f"POST /aggregate - Request received for cid: {component_input.cid}, task: {component_input.task}, previous_outputs count: {previous_outputs_count}")
+    logger.info("POST /aggregate - Request received for cid: %s, task: %s, previous_outputs count: %s", component_input.cid, component_input.task, previous_outputs_count)
+    _require_previous_outputs(component_input, "/aggregate")
     try:
         context = conversation_manager.get_or_create(component_input.cid)
-        logger.debug(f"POST /aggregate - Conversation context retrieved for cid: {component_input.cid}")
+        logger.debug("POST /aggregate - Conversation context retrieved for cid: %s", component_input.cid)
         result = await component_aggregate(component_input, context)
-        logger.info(f"POST /aggregate - Successfully aggregated outputs for cid: {component_input.cid}, component: {result.component}")
+        logger.info("POST /aggregate - Successfully aggregated outputs for cid: %s, component: %s", component_input.cid, result.component)
         return result
     except Exception as e:
-        logger.error(f"POST /aggregate - Error in aggregate endpoint for cid: {component_input.cid}: {str(e)}", exc_info=True)
+        logger.error("POST /aggregate - Error in aggregate endpoint for cid: %s: %s", component_input.cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -477,16 +610,16 @@ async def list_all_conversations(request: Request):
     logger.info("GET /conversations - Request to list all conversations")
     try:
         # Get stats directly from conversation manager (uses database)
-        stats = conversation_manager.get_stats_sync()
+        stats = await conversation_manager.get_stats()
         
         response = {
             "total_conversations": stats["total_conversations"],
             "conversations": stats["conversations"]
         }
-        logger.info(f"GET /conversations - Successfully retrieved {stats['total_conversations']} conversations")
+        logger.info("GET /conversations - Successfully retrieved %s conversations", stats['total_conversations'])
         return response
     except Exception as e:
-        logger.error(f"GET /conversations - Error listing conversations: {str(e)}", exc_info=True)
+        logger.error("GET /conversations - Error listing conversations: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -504,22 +637,22 @@ async def get_conversation_history(request: Request, cid: str):
     Returns:
         Dict with conversation metadata and complete message history
     """
-    logger.info(f"GET /conversations/{cid} - Request to get conversation history")
+    logger.info("GET /conversations/%s - Request to get conversation history", cid)
     try:
-        context = conversation_manager.get_or_create(cid)
-        messages = await context.get_messages()
+        history = await conversation_manager.get_history(cid)
+        messages = history["messages"] if history else []
         
         response = {
             "cid": cid,
             "message_count": len(messages),
             "messages": messages,
-            "created_at": context.created_at.isoformat() if hasattr(context, 'created_at') else None,
-            "last_activity": context.last_activity.isoformat() if hasattr(context, 'last_activity') else None
+            "created_at": history["created_at"].isoformat() if history else None,
+            "last_activity": history["last_updated"].isoformat() if history else None
         }
-        logger.info(f"GET /conversations/{cid} - Successfully retrieved conversation with {len(messages)} messages")
+        logger.info("GET /conversations/%s - Successfully retrieved conversation with %s messages", cid, len(messages))
         return response
     except Exception as e:
-        logger.error(f"GET /conversations/{cid} - Error retrieving conversation: {str(e)}", exc_info=True)
+        logger.error("GET /conversations/%s - Error retrieving conversation: %s", cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -537,13 +670,13 @@ async def delete_conversation(request: Request, cid: str):
     Returns:
         Success message
     """
-    logger.info(f"DELETE /conversations/{cid} - Request to delete conversation")
+    logger.info("DELETE /conversations/%s - Request to delete conversation", cid)
     try:
         # Check if conversation exists in database
-        context = conversation_manager.get(cid)
+        context = await conversation_manager.get(cid)
         
         if context is None:
-            logger.warning(f"DELETE /conversations/{cid} - Conversation not found")
+            logger.warning("DELETE /conversations/%s - Conversation not found", cid)
             raise HTTPException(
                 status_code=404,
                 detail=f"Conversation {cid} not found"
@@ -551,7 +684,7 @@ async def delete_conversation(request: Request, cid: str):
         
         # Delete from database
         await conversation_manager.delete(cid)
-        logger.info(f"DELETE /conversations/{cid} - Successfully deleted conversation from database")
+        logger.info("DELETE /conversations/%s - Successfully deleted conversation from database", cid)
         
         response = {
             "success": True,
@@ -562,13 +695,13 @@ async def delete_conversation(request: Request, cid: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"DELETE /conversations/{cid} - Error deleting conversation: {str(e)}", exc_info=True)
+        logger.error("DELETE /conversations/%s - Error deleting conversation: %s", cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/playbook/{cid}", dependencies=[Depends(verify_api_key)])
 @limiter.limit("30/minute")
-async def get_playbook(request: Request, cid: str):
+async def get_playbook(request: Request, cid: str, include_context: bool = False):
     """
     Get playbook entries for a specific conversation.
     
@@ -577,26 +710,32 @@ async def get_playbook(request: Request, cid: str):
     
     Args:
         cid: Conversation ID
+        include_context: Also return the formatted context (same as /playbook/{cid}/context)
         
     Returns:
         Dict with playbook entries and metadata
     """
-    logger.info(f"GET /playbook/{cid} - Request to get playbook entries")
+    logger.info("GET /playbook/%s - Request to get playbook entries", cid)
     try:
         from src.services.components import get_playbook_service
         
         playbook_service = get_playbook_service()
-        entries = await playbook_service.get_playbook(cid)
+        if include_context:
+            entries, context = await playbook_service.get_with_formatted(cid)
+        else:
+            entries = await playbook_service.get_playbook(cid)
         
         response = {
             "cid": cid,
             "entry_count": len(entries),
             "entries": entries
         }
-        logger.info(f"GET /playbook/{cid} - Successfully retrieved {len(entries)} playbook entries")
+        if include_context:
+            response["formatted_context"] = context
+        logger.info("GET /playbook/%s - Successfully retrieved %s playbook entries", cid, len(entries))
         return response
     except Exception as e:
-        logger.error(f"GET /playbook/{cid} - Error retrieving playbook: {str(e)}", exc_info=True)
+        logger.error("GET /playbook/%s - Error retrieving playbook: %s", cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -615,17 +754,12 @@ async def get_playbook_context(request: Request, cid: str):
     Returns:
         Dict with formatted context string
     """
-    logger.info(f"GET /playbook/{cid}/context - Request to get formatted playbook context")
+    logger.info("GET /playbook/%s/context - Request to get formatted playbook context", cid)
     try:
         from src.services.components import get_playbook_service
         
         playbook_service = get_playbook_service()
-        entries = await playbook_service.get_playbook(cid)
-        
-        if entries:
-            context = playbook_service.format_playbook_context(entries)
-        else:
-            context = "No playbook entries found for this conversation."
+        entries, context = await playbook_service.get_with_formatted(cid)
         
         response = {
             "cid": cid,
@@ -633,10 +767,10 @@ async def get_playbook_context(request: Request, cid: str):
             "formatted_context": context,
             "entries": entries
         }
-        logger.info(f"GET /playbook/{cid}/context - Successfully retrieved and formatted {len(entries)} playbook entries")
+        logger.info("GET /playbook/%s/context - Successfully retrieved and formatted %s playbook entries", cid, len(entries))
         return response
     except Exception as e:
-        logger.error(f"GET /playbook/{cid}/context - Error retrieving playbook context: {str(e)}", exc_info=True)
+        logger.error("GET /playbook/%s/context - Error retrieving playbook context: %s", cid, e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -3,6 +3,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from typing import Optional
+from functools import cached_property
 
 
 class Settings(BaseSettings):
@@ -40,6 +41,7 @@ class Settings(BaseSettings):
     # Model Configuration
     max_tokens: int = 4000
     temperature: float = 0.7
+    llm_json_schema: bool = False  # Have the provider enforce the component output schema (opt-in); False = plain JSON mode
     
     # Conversation History Settings
     max_conversation_messages: int = 10
@@ -51,6 +53,7 @@ class Settings(BaseSettings):
     connection_pool_max: int = 100
     connection_pool_keepalive_expiry: int = 30
     request_timeout: int = 60
+    llm_max_concurrency: int = 50  # Max in-flight LLM completions; keep below connection_pool_max
     
     # Miner Configuration
     miner_name: str = "sample-miner"
@@ -63,6 +66,12 @@ class Settings(BaseSettings):
     redis_solution_ttl: int = 50  # Solution TTL in seconds (50s < 60s request interval)
     redis_wait_timeout: int = 55  # Max time to wait for parent solution (55 seconds)
     
+    # Rate Limiting
+    # Counter storage for slowapi; use e.g. "redis://localhost:6379/1" so limits are
+    # shared across uvicorn workers / miner instances instead of per process
+    rate_limit_storage_uri: str = "memory://"
+    rate_limit_strategy: str = "moving-window"  # Options: "fixed-window", "moving-window"
+    
     # API Settings
     debug: bool = False
     log_level: str = "INFO"
@@ -74,12 +83,17 @@ class Settings(BaseSettings):
     # Google Custom Search API Configuration
     google_api_key: str = ""  # Google Custom Search API key
     google_cx_key: str = ""  # Google Custom Search Engine ID (CX)
+    google_cache_ttl: int = 300  # Seconds to reuse results for a repeated (query, num_results)
+    google_max_concurrency: int = 8  # Max in-flight search requests (Custom Search allows ~10 QPS)
+    google_max_retries: int = 3  # Retries on 429/5xx responses, with exponential backoff
     
     # Database Configuration (SQLite)
     database_url: str = "sqlite:///./data/miner_api.db"
     database_pool_size: int = 10
     database_max_overflow: int = 20
     database_pool_recycle: int = 3600  # 1 hour
+    database_echo: bool = False  # Log every SQL statement (independent of DEBUG)
+    app_ephemeral: bool = False  # Keep the SQLite file on /dev/shm (tests, short-lived workers)
     
     model_config = ConfigDict(
         env_file=".env",
@@ -129,6 +143,11 @@ class Settings(BaseSettings):
         
         return key
     
+    @cached_property
+    def api_key_bytes(self) -> bytes:
+        """API key encoded once for constant-time comparison (validated on first use)."""
+        return self.get_api_key.encode('utf-8')
+    
     @property
     def get_vllm_base_url(self) -> str:
         """Get vLLM base URL."""
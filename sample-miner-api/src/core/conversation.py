@@ -3,14 +3,16 @@
 This module uses SQLite for persistent storage (file-based, zero configuration).
 Database file location: ./data/miner_api.db (configured in .env)
 
-All database operations are run in a thread pool to enable concurrent request handling.
+Database operations use the async engine (aiosqlite), so they are awaited directly
+on the event loop without thread-pool hops.
 """
 
 import logging
-import asyncio
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 from src.repositories.conversation_repository import ConversationRepository
+from src.utils.cache import TTLCache
+from src.utils.locks import KeyedLock
 
 logger = logging.getLogger(__name__)
 
@@ -27,15 +29,43 @@ class ConversationContext:
     MAX_MESSAGES = 10  # Store up to 10 recent messages
     MAX_MESSAGE_AGE_DAYS = 7  # Auto-delete messages older than 7 days
     
-    def __init__(self, cid: str):
+    def __init__(
+        self,
+        cid: str,
+        repository: Optional[ConversationRepository] = None,
+        write_lock: Optional[KeyedLock] = None,
+        on_write: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the conversation context.
+        
+        Args:
+            cid: Conversation ID
+            repository: Shared repository to use (a new one is created if omitted)
+            write_lock: Shared per-CID lock that serializes writes to one conversation
+            on_write: Called with the CID after each write (used to invalidate read caches)
+        """
         self.cid = cid
-        self.repository = ConversationRepository()
+        self.repository = repository or ConversationRepository()
+        # Set once the conversation row is known to exist, so repeat requests
+        # on this (cached) context skip the upsert
+        self.exists = False
+        self._write_lock = write_lock or KeyedLock()
+        self._on_write = on_write
         # Note: Conversation creation is deferred to first async operation
         # This prevents blocking during initialization
     
     async def _ensure_conversation_exists(self):
         """Ensure conversation exists in database (async wrapper)."""
-        await asyncio.to_thread(self.repository.get_or_create_conversation, self.cid)
+        if self.exists:
+            return
+        await self.repository.get_or_create_conversation(self.cid)
+        self.exists = True
+    
+    def _notify_write(self):
+        """Tell the owner that this conversation changed."""
+        if self._on_write:
+            self._on_write(self.cid)
     
     async def add_message(self, role: str, content: str, extra_data: Optional[dict] = None):
         """
@@ -47,17 +77,12 @@ class ConversationContext:
             logger.warning(f"Skipping empty message for conversation {self.cid}")
             return
         
-        # Ensure conversation exists first
-        await self._ensure_conversation_exists()
-        
-        # Add message to database (run in thread pool to avoid blocking)
-        await asyncio.to_thread(
-            self.repository.add_message,
-            self.cid,
-            role,
-            content,
-            extra_data
-        )
+        # Writes to the same conversation don't interleave (avoids SQLite busy retries).
+        # The repository upserts the conversation row in the same transaction.
+        async with self._write_lock(self.cid):
+            await self.repository.add_message(self.cid, role, content, extra_data)
+        self.exists = True
+        self._notify_write()
     
     async def add_user_message(self, content: str, extra_data: Optional[dict] = None):
         """Add a user message to conversation history."""
@@ -67,6 +92,35 @@ class ConversationContext:
         """Add an assistant message to conversation history."""
         await self.add_message("assistant", content, extra_data)
     
+    async def add_turn(
+        self,
+        user_content: str,
+        assistant_content: str,
+        user_extra: Optional[dict] = None,
+        assistant_extra: Optional[dict] = None
+    ):
+        """
+        Add a user message and the assistant reply in one database transaction.
+        Empty messages are skipped, as in add_message.
+        """
+        items = [
+            (role, content, extra)
+            for role, content, extra in (
+                ("user", user_content, user_extra),
+                ("assistant", assistant_content, assistant_extra),
+            )
+            if content and content.strip()
+        ]
+        if len(items) < 2:
+            logger.warning(f"Skipping empty message for conversation {self.cid}")
+        if not items:
+            return
+        
+        async with self._write_lock(self.cid):
+            await self.repository.add_messages(self.cid, items)
+        self.exists = True
+        self._notify_write()
+    
     async def get_messages(self) -> List[Dict]:
         """
         Get conversation history as a list of message dictionaries.
@@ -75,12 +129,7 @@ class ConversationContext:
         # Ensure conversation exists first
         await self._ensure_conversation_exists()
         
-        messages = await asyncio.to_thread(
-            self.repository.get_recent_messages,
-            self.cid,
-            self.MAX_MESSAGES
-        )
-        return messages
+        return await self.repository.get_recent_messages(self.cid, self.MAX_MESSAGES)
     
     async def get_context_summary(self) -> str:
         """
@@ -90,13 +139,14 @@ class ConversationContext:
         if not messages:
             return "No conversation context yet."
         
-        history_text = "Recent conversation:\n"
+        parts = ["Recent conversation:\n"]
         for msg in messages[-5:]:  # Show last 5 messages
-            role = msg['role'].capitalize()
-            content = msg['content'][:100] + "..." if len(msg['content']) > 100 else msg['content']
-            history_text += f"{role}: {content}\n"
+            content = msg['content']
+            if len(content) > 100:
+                content = content[:100] + "..."
+            parts.append(f"{msg['role'].capitalize()}: {content}\n")
         
-        return history_text
+        return "".join(parts)
     
     async def get_context(self) -> str:
         """
@@ -115,39 +165,35 @@ class ConversationContext:
         Returns:
             List of message dictionaries
         """
-        return await asyncio.to_thread(
-            self.repository.get_recent_messages,
-            self.cid,
-            count
-        )
+        return await self.repository.get_recent_messages(self.cid, count)
     
     async def clear(self):
         """Clear conversation messages by deleting the conversation."""
-        await asyncio.to_thread(self.repository.delete_conversation, self.cid)
+        async with self._write_lock(self.cid):
+            await self.repository.delete_conversation(self.cid)
+        self.exists = False
+        self._notify_write()
         logger.info(f"Cleared messages for conversation {self.cid}.")
     
     async def get_created_at(self) -> Optional[datetime]:
         """Get conversation creation time."""
-        conversation = await asyncio.to_thread(self.repository.get_conversation, self.cid)
+        conversation = await self.repository.get_conversation(self.cid)
         return conversation.created_at if conversation else None
     
     async def get_last_updated(self) -> Optional[datetime]:
         """Get last update time."""
-        conversation = await asyncio.to_thread(self.repository.get_conversation, self.cid)
+        conversation = await self.repository.get_conversation(self.cid)
         return conversation.last_updated if conversation else None
     
-    # Properties for backward compatibility (now async)
-    @property
-    def created_at(self) -> Optional[datetime]:
-        """Get conversation creation time (synchronous, for backward compatibility)."""
-        conversation = self.repository.get_conversation(self.cid)
-        return conversation.created_at if conversation else None
-    
-    @property
-    def last_activity(self) -> Optional[datetime]:
-        """Get last update time (synchronous, for backward compatibility)."""
-        conversation = self.repository.get_conversation(self.cid)
-        return conversation.last_updated if conversation else None
+    async def get_history(self) -> Optional[Dict]:
+        """
+        Get conversation timestamps and recent messages with a single DB query round.
+        
+        Returns:
+            Dict with created_at, last_updated and messages, or None if the
+            conversation does not exist
+        """
+        return await self.repository.get_conversation_with_messages(self.cid, self.MAX_MESSAGES)
 
 
 class ConversationManager:
@@ -156,66 +202,86 @@ class ConversationManager:
     Now uses SQLite database for persistent storage.
     """
     
+    MAX_CACHED_CONTEXTS = 10000  # Contexts kept in memory for reuse
+    CONTEXT_CACHE_TTL = 300  # Seconds before an idle context is rebuilt
+    READ_CACHE_TTL = 5  # Seconds to serve stats/history reads from memory
+    
     def __init__(self):
         self.repository = ConversationRepository()
+        # Per-CID write locks shared by every context handed out
+        self._write_lock = KeyedLock()
+        # Recently used contexts, so hot CIDs reuse one object and the shared repository
+        self._contexts = TTLCache(maxsize=self.MAX_CACHED_CONTEXTS, ttl=self.CONTEXT_CACHE_TTL)
+        # Short-lived read caches for polling clients; invalidated on every write
+        self._stats_cache = TTLCache(maxsize=1, ttl=self.READ_CACHE_TTL)
+        self._history_cache = TTLCache(maxsize=1024, ttl=self.READ_CACHE_TTL)
     
     def get_or_create(self, cid: str) -> ConversationContext:
         """Get an existing conversation or create a new one."""
-        return ConversationContext(cid)
+        context = self._contexts.get(cid)
+        if context is None:
+            context = ConversationContext(
+                cid, self.repository, self._write_lock, self._invalidate
+            )
+            self._contexts.set(cid, context)
+        return context
     
-    def get(self, cid: str) -> Optional[ConversationContext]:
+    async def get(self, cid: str) -> Optional[ConversationContext]:
         """Get an existing conversation context."""
-        conversation = self.repository.get_conversation(cid)
+        conversation = await self.repository.get_conversation(cid)
         if conversation:
-            return ConversationContext(cid)
+            context = self.get_or_create(cid)
+            context.exists = True
+            return context
         return None
     
+    def _invalidate(self, cid: str):
+        """Drop cached reads that a write to this conversation makes stale."""
+        self._history_cache.pop((cid, ConversationContext.MAX_MESSAGES))
+        self._stats_cache.clear()
+    
+    def _forget(self, cid: str):
+        """Drop cached state for a deleted conversation."""
+        self._contexts.pop(cid)
+        self._invalidate(cid)
+    
     async def delete(self, cid: str):
         """Delete a conversation context."""
-        await asyncio.to_thread(self.repository.delete_conversation, cid)
+        async with self._write_lock(cid):
+            await self.repository.delete_conversation(cid)
+        self._forget(cid)
     
-    def delete_sync(self, cid: str):
-        """Delete a conversation context (synchronous version for backward compatibility)."""
-        self.repository.delete_conversation(cid)
+    async def get_history(self, cid: str) -> Optional[Dict]:
+        """
+        Get conversation timestamps and recent messages, cached briefly.
+        
+        Returns:
+            Dict with created_at, last_updated and messages, or None if the
+            conversation does not exist
+        """
+        key = (cid, ConversationContext.MAX_MESSAGES)
+        history = self._history_cache.get(key)
+        if history is None:
+            history = await self.get_or_create(cid).get_history()
+            if history is not None:
+                self._history_cache.set(key, history)
+        return history
     
     async def get_stats(self) -> Dict:
-        """Get statistics about conversations."""
-        conversations = await asyncio.to_thread(
-            self.repository.get_all_conversations,
-            100
-        )
+        """Get statistics about conversations (cached for READ_CACHE_TTL seconds)."""
+        stats = self._stats_cache.get("stats")
+        if stats is not None:
+            return stats
         
-        return {
-            "total_conversations": len(conversations),
-            "max_conversations": 100,  # Database limit for stats display
-            "conversations": [
-                {
-                    "cid": conv.cid,
-                    "messages": conv.message_count,
-                    "created_at": conv.created_at.isoformat(),
-                    "last_updated": conv.last_updated.isoformat()
-                }
-                for conv in conversations
-            ]
-        }
-    
-    def get_stats_sync(self) -> Dict:
-        """Get statistics about conversations (synchronous version for backward compatibility)."""
-        conversations = self.repository.get_all_conversations(limit=100)
+        conversations = await self.repository.get_all_conversation_stats(limit=100)
         
-        return {
+        stats = {
             "total_conversations": len(conversations),
             "max_conversations": 100,  # Database limit for stats display
-            "conversations": [
-                {
-                    "cid": conv.cid,
-                    "messages": conv.message_count,
-                    "created_at": conv.created_at.isoformat(),
-                    "last_updated": conv.last_updated.isoformat()
-                }
-                for conv in conversations
-            ]
+            "conversations": conversations
         }
+        self._stats_cache.set("stats", stats)
+        return stats
 
 
 # Global conversation manager instance
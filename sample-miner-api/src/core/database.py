@@ -1,37 +1,75 @@
 """Database configuration and session management for SQLite."""
 
+import asyncio
+import functools
 import logging
 import os
-from pathlib import Path
-from typing import Generator
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Type, TypeVar
+
+# Prefer the bundled, newer SQLite from pysqlite3-binary when it's installed.
+# It is handed to the engines explicitly (see below) rather than swapped in for
+# the stdlib sqlite3 module, so other libraries and import order are unaffected.
+try:
+    import pysqlite3
+    PYSQLITE3_AVAILABLE = True
+except ImportError:
+    pysqlite3 = None
+    PYSQLITE3_AVAILABLE = False
+
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, insert
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from src.core.config import settings
 
-# Import all models to ensure they're registered with SQLModel
-from src.models.db_models import Conversation, Message
-from src.models.playbook_models import PlaybookEntry, PlaybookOperation
-
 logger = logging.getLogger(__name__)
 
 # Database URL from settings (defaults to SQLite)
 DATABASE_URL = settings.database_url
 
-# Ensure data directory exists for SQLite
-if DATABASE_URL.startswith("sqlite"):
-    # Handle both relative and absolute paths
-    db_path = DATABASE_URL.replace("sqlite:///", "")
-    
-    # Convert to Path object for better path handling
-    db_file = Path(db_path)
-    
-    # Create parent directory if it doesn't exist
-    if db_file.parent and str(db_file.parent) != ".":
-        db_file.parent.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Created database directory: {db_file.parent}")
+# SQLite database file path (relative or absolute), None for other databases
+db_path = DATABASE_URL.replace("sqlite:///", "") if DATABASE_URL.startswith("sqlite") else None
+
+# Ephemeral deployments (test runs, short-lived workers) keep the SQLite file
+# on tmpfs so database I/O never touches the disk. Data does not survive a reboot.
+EPHEMERAL_DB_DIR = "/dev/shm"
+if settings.app_ephemeral and db_path and db_path != ":memory:":
+    if os.path.isdir(EPHEMERAL_DB_DIR) and os.access(EPHEMERAL_DB_DIR, os.W_OK):
+        db_path = os.path.join(EPHEMERAL_DB_DIR, os.path.basename(db_path))
+        DATABASE_URL = f"sqlite:///{db_path}"
+        logger.info(f"Ephemeral mode: using database at {db_path}")
+    else:
+        logger.warning(f"Ephemeral mode requested but {EPHEMERAL_DB_DIR} is not writable; using {db_path}")
+
+# Serializes use of the sync engine; unrelated to the per-CID KeyedLock that
+# serializes conversation writes on the async engine. On SQLite the sync
+# engine is backed by a single shared connection, so a session must not
+# overlap another one (a closing session rolls back the shared connection).
+# Hold it for the lifetime of any session or connection on `engine`.
+sync_engine_lock = threading.Lock()
+
+# Blocking work on the sync engine runs on this single thread via run_db(), so
+# it never stalls the event loop. One worker matches the one shared SQLite
+# connection: sessions run in submission order instead of waiting on the lock.
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+T = TypeVar("T")
+
+# Seconds between background PRAGMA optimize runs
+OPTIMIZE_INTERVAL = 3600
+
+# Seconds between background WAL size checks, and the size (bytes) above which
+# the WAL is checkpointed. The same size caps the file SQLite leaves on disk
+# once the log is reset (journal_size_limit).
+CHECKPOINT_INTERVAL = 60
+WAL_CHECKPOINT_THRESHOLD = 100 * 1024 * 1024
 
 # Create engine with appropriate settings for SQLite
-# Enable WAL mode for better concurrent access from multiple workers
+# WAL mode (enabled in create_db_and_tables) allows concurrent access from multiple workers
 if DATABASE_URL.startswith("sqlite"):
     # Use WAL mode for better multi-process/worker support
     # WAL allows concurrent reads and writes without blocking
@@ -39,25 +77,34 @@ if DATABASE_URL.startswith("sqlite"):
         "check_same_thread": False,
         "timeout": 30.0  # Wait up to 30 seconds for locks
     }
+    # One long-lived connection shared by every sync session: no per-session
+    # connect or pragma replay. Sessions must hold `sync_engine_lock` (above).
     engine = create_engine(
         DATABASE_URL,
-        echo=settings.debug,
+        echo=settings.database_echo,
         connect_args=connect_args,
-        poolclass=None
+        poolclass=StaticPool,
+        query_cache_size=1200,  # Compiled SQL cache (default 500)
+        module=pysqlite3  # None falls back to the stdlib sqlite3 driver
     )
-    # Enable WAL mode after engine creation
+    # Per-connection pragmas
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_conn, connection_record):
-        """Enable WAL mode for SQLite to support concurrent access."""
+        """Apply per-connection SQLite settings (WAL itself is set in create_db_and_tables)."""
         cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")  # Balance between safety and performance
         cursor.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
+        cursor.execute("PRAGMA cache_size=-20000")  # ~20MB page cache per connection
+        cursor.execute("PRAGMA temp_store=MEMORY")  # Keep temp tables/indices in RAM
+        cursor.execute("PRAGMA mmap_size=268435456")  # Memory-map up to 256MB of the DB file
+        cursor.execute("PRAGMA foreign_keys=ON")  # Enforce message/playbook FK constraints
+        cursor.execute("PRAGMA wal_autocheckpoint=1000")  # Checkpoint every ~1000 WAL pages
+        cursor.execute(f"PRAGMA journal_size_limit={WAL_CHECKPOINT_THRESHOLD}")  # Truncate an oversized WAL on reset
         cursor.close()
 else:
     engine = create_engine(
         DATABASE_URL,
-        echo=settings.debug,
+        echo=settings.database_echo,
         connect_args={},
         pool_size=settings.database_pool_size,
         max_overflow=settings.database_max_overflow,
@@ -65,25 +112,270 @@ else:
     )
 
 
+def _to_async_url(url: str) -> str:
+    """Map a sync database URL to its asyncio driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def _pysqlite3_async_engine_args() -> Dict[str, Any]:
+    """
+    create_async_engine arguments that run aiosqlite on pysqlite3.
+    
+    aiosqlite always opens connections with the stdlib sqlite3 module, so the
+    connection is created here instead. The dialect also gets a pysqlite3-backed
+    DBAPI, so driver errors and the SQLite version (which decides RETURNING
+    support) come from the library actually in use.
+    """
+    import aiosqlite
+    from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_dbapi
+    
+    async def connect():
+        connection = aiosqlite.Connection(
+            functools.partial(pysqlite3.connect, db_path, timeout=30.0),
+            iter_chunk_size=64
+        )
+        # Don't let the driver thread keep the process alive at exit
+        # (aiosqlite < 0.22 connections are the thread themselves)
+        getattr(connection, "_thread", connection).daemon = True
+        return await connection
+    
+    return {"module": AsyncAdapt_aiosqlite_dbapi(aiosqlite, pysqlite3), "async_creator": connect}
+
+
+# Async engine for request-path queries (conversation storage), so handlers
+# await the database directly instead of hopping to the thread pool.
+# The sync engine above is still used for table creation and the playbook service.
+ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+
+if DATABASE_URL.startswith("sqlite"):
+    async_sqlite_args = _pysqlite3_async_engine_args() if PYSQLITE3_AVAILABLE else {}
+    
+    # SQLite allows a single writer, so writes share one connection and take
+    # the write lock up front (BEGIN IMMEDIATE). A deferred transaction that
+    # reads and then upgrades to a write can fail with SQLITE_BUSY under WAL
+    # instead of waiting on busy_timeout.
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=settings.database_echo,
+        connect_args={"timeout": 30.0},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=30,
+        query_cache_size=1200,
+        **async_sqlite_args
+    )
+    
+    # Reads run in parallel under WAL on a separate pool, so they never queue
+    # behind the writer connection
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=settings.database_echo,
+        connect_args={"timeout": 30.0},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        query_cache_size=1200,
+        **async_sqlite_args
+    )
+    
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_sqlite_pragma(dbapi_conn, connection_record):
+        """Apply pragmas and let SQLAlchemy emit BEGIN on writer connections."""
+        set_sqlite_pragma(dbapi_conn, connection_record)
+        # Disable the driver's own deferred BEGIN; see begin_immediate below
+        dbapi_conn.isolation_level = None
+    
+    @event.listens_for(async_engine.sync_engine, "begin")
+    def begin_immediate(conn):
+        """Acquire the write lock when the transaction starts."""
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    
+    @event.listens_for(async_read_engine.sync_engine, "connect")
+    def set_async_read_sqlite_pragma(dbapi_conn, connection_record):
+        """Apply pragmas and reject writes on reader connections."""
+        set_sqlite_pragma(dbapi_conn, connection_record)
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=settings.database_echo,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_recycle=settings.database_pool_recycle
+    )
+    # Server databases handle concurrent writers; share one pool
+    async_read_engine = async_engine
+
+# Session factories, configured once instead of on every session. Objects are
+# not expired on commit, so attributes stay readable after the session closes
+# without triggering lazy loads.
+SessionLocal = sessionmaker(bind=engine, class_=Session, autoflush=False, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _ensure_db_directory():
+    """Create the SQLite data directory if it doesn't exist yet."""
+    if not db_path:
+        return
+    db_dir = os.path.dirname(db_path)
+    if db_dir and db_dir != "." and not os.path.isdir(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+        logger.info(f"Created database directory: {db_dir}")
+
+
 def create_db_and_tables():
     """Create all database tables."""
+    # Import all models to ensure they're registered with SQLModel. Done here
+    # rather than at module level so importing this module stays cheap for
+    # entry points that never create tables.
+    from src.models.db_models import Conversation, Message
+    from src.models.playbook_models import PlaybookEntry, PlaybookOperation
+    
+    _ensure_db_directory()
     logger.info("Creating database tables...")
-    SQLModel.metadata.create_all(engine)
+    if DATABASE_URL.startswith("sqlite"):
+        # journal_mode is persisted in the database file, so it only needs to
+        # be set once rather than on every new connection
+        with sync_engine_lock, engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            sqlite_version = conn.exec_driver_sql("SELECT sqlite_version()").scalar()
+        logger.info(
+            f"Using SQLite {sqlite_version} "
+            f"({'pysqlite3-binary' if PYSQLITE3_AVAILABLE else 'stdlib sqlite3'})"
+        )
+    with sync_engine_lock:
+        SQLModel.metadata.create_all(engine)
     logger.info("Database tables created successfully")
+    if DATABASE_URL.startswith("sqlite"):
+        _warm_sqlite_cache()
+        optimize_database()
+
+
+def _warm_sqlite_cache():
+    """
+    Touch every table once so its pages are in the OS page cache / mmap
+    region before the first request, instead of being faulted in by it.
+    """
+    try:
+        with sync_engine_lock, engine.connect() as conn:
+            for table in SQLModel.metadata.sorted_tables:
+                conn.exec_driver_sql(f'SELECT count(*) FROM "{table.name}"')
+        logger.info("Database cache warmed")
+    except Exception as e:
+        logger.warning(f"Database cache warmup failed: {e}")
+
+
+def optimize_database():
+    """
+    Refresh SQLite query planner statistics (sqlite_stat1) where stale.
+    
+    Run at startup and every OPTIMIZE_INTERVAL seconds from the app's
+    maintenance task. analysis_limit caps the rows ANALYZE samples per index,
+    so this stays cheap on large tables. A database that was never analyzed
+    gets a full ANALYZE, since PRAGMA optimize before SQLite 3.46 only looks
+    at tables this connection has queried; mask 0x10002 widens it to every
+    table on newer versions.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+    try:
+        with sync_engine_lock, engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+            analyzed = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).first()
+            conn.exec_driver_sql("PRAGMA optimize=0x10002" if analyzed else "ANALYZE")
+            conn.commit()
+        logger.debug("SQLite planner statistics refreshed")
+    except Exception as e:
+        logger.warning(f"PRAGMA optimize failed: {e}")
 
 
-def get_session() -> Generator[Session, None, None]:
+def maybe_checkpoint() -> bool:
     """
-    Get database session.
-    Use as dependency in FastAPI endpoints.
+    Checkpoint the WAL file if it has grown past the threshold.
+    
+    Auto-checkpoints can fall behind under sustained load. PASSIVE copies as
+    many frames as it can without waiting on readers or writers, so it never
+    stalls the database thread (and the playbook requests queued behind it)
+    the way RESTART can for up to busy_timeout. Once the log is fully
+    checkpointed, the next writer starts it over and journal_size_limit
+    truncates the file.
+    
+    Returns:
+        True if a checkpoint was run
     """
-    with Session(engine) as session:
-        yield session
+    if not db_path or db_path == ":memory:":
+        return False
+    try:
+        wal_size = os.path.getsize(db_path + "-wal")
+    except OSError:
+        return False
+    if wal_size < WAL_CHECKPOINT_THRESHOLD:
+        return False
+    
+    try:
+        with sync_engine_lock, engine.connect() as conn:
+            busy, log_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").one()
+        logger.info(
+            f"WAL checkpoint: {wal_size // (1024 * 1024)}MB log, "
+            f"{checkpointed}/{log_pages} pages checkpointed{' (busy)' if busy else ''}"
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"WAL checkpoint failed: {e}")
+        return False
 
 
-def get_db_session() -> Session:
+def bulk_insert(session: Session, model: Type[SQLModel], rows: List[Dict[str, Any]]) -> None:
     """
-    Get database session for non-FastAPI usage.
+    Insert many rows of a table with one executemany.
+    
+    Runs in the caller's transaction, so a batch of writes still commits once
+    (one WAL sync) instead of flushing an INSERT per row.
+    
+    Args:
+        session: Open session on `engine` (caller holds `sync_engine_lock`)
+        model: SQLModel table class to insert into
+        rows: Column values for each row
+    """
+    if rows:
+        session.exec(insert(model), params=rows)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking sync-engine function on the database thread.
+    
+    Args:
+        func: Function that opens its own session on `engine`
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+def get_async_db_session(readonly: bool = False) -> AsyncSession:
+    """
+    Get an async database session.
     Remember to close the session when done.
+    
+    Args:
+        readonly: Use the reader pool; the session must not write
+        
+    Returns:
+        AsyncSession bound to the reader or writer engine
     """
-    return Session(engine)
+    return AsyncReadSessionLocal() if readonly else AsyncSessionLocal()
@@ -1,22 +1,31 @@
 """Conversation repository for database operations."""
 
 import logging
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
-from sqlmodel import Session, select, func, delete
+from sqlmodel import select, func, delete
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.models.db_models import Conversation, Message
-from src.core.database import get_db_session
+from src.core.database import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
 
 class ConversationRepository:
-    """Repository for conversation database operations."""
+    """
+    Repository for conversation database operations.
+    
+    All methods are coroutines running on the async engine, so callers await
+    them directly instead of dispatching to a thread pool.
+    """
     
     MAX_MESSAGES = 10  # Store up to 10 recent messages per conversation
     MAX_MESSAGE_AGE_DAYS = 7  # Auto-delete messages older than 1 week
     
-    def __init__(self, session: Optional[Session] = None):
+    def __init__(self, session: Optional[AsyncSession] = None):
         """
         Initialize repository with optional session.
         If no session provided, will create one per operation.
@@ -24,44 +33,49 @@ class ConversationRepository:
         self._session = session
         self._owns_session = session is None
     
-    def _get_session(self) -> Session:
-        """Get session (existing or create new)."""
+    def _get_session(self, readonly: bool = False) -> AsyncSession:
+        """Get session (existing or create new, from the reader pool if readonly)."""
         if self._session:
             return self._session
-        return get_db_session()
+        return get_async_db_session(readonly=readonly)
+    
+    async def _close(self, session: AsyncSession):
+        """Close the session if this repository created it."""
+        if self._owns_session:
+            await session.close()
+    
+    async def _find_conversation(self, session: AsyncSession, cid: str) -> Optional[Conversation]:
+        """Look up a conversation by CID within an existing session."""
+        statement = select(Conversation).where(Conversation.cid == cid)
+        return (await session.exec(statement)).first()
     
-    def get_or_create_conversation(self, cid: str) -> Conversation:
+    async def get_or_create_conversation(self, cid: str) -> Conversation:
         """Get existing conversation or create new one."""
         session = self._get_session()
         try:
             # Try to find existing conversation
-            statement = select(Conversation).where(Conversation.cid == cid)
-            conversation = session.exec(statement).first()
+            conversation = await self._find_conversation(session, cid)
             
             if not conversation:
                 # Create new conversation
                 conversation = Conversation(cid=cid)
                 session.add(conversation)
-                session.commit()
-                session.refresh(conversation)
+                await session.commit()
                 logger.info(f"Created new conversation: {cid}")
             
             return conversation
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def get_conversation(self, cid: str) -> Optional[Conversation]:
+    async def get_conversation(self, cid: str) -> Optional[Conversation]:
         """Get conversation by CID."""
-        session = self._get_session()
+        session = self._get_session(readonly=True)
         try:
-            statement = select(Conversation).where(Conversation.cid == cid)
-            return session.exec(statement).first()
+            return await self._find_conversation(session, cid)
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def add_message(
+    async def add_message(
         self,
         cid: str,
         role: str,
@@ -74,53 +88,92 @@ class ConversationRepository:
         """
         session = self._get_session()
         try:
-            # Get or create conversation in this session
-            statement = select(Conversation).where(Conversation.cid == cid)
-            conversation = session.exec(statement).first()
-            
-            if not conversation:
-                # Create new conversation
-                conversation = Conversation(cid=cid)
-                session.add(conversation)
-                session.commit()
-                session.refresh(conversation)
-                logger.info(f"Created new conversation: {cid}")
+            # Create the conversation if needed, in the same transaction as the insert
+            conversation_id = await self._upsert_conversation(session, cid)
             
             # Clean up old messages first
-            self._cleanup_old_messages(session, conversation.id)
+            await self._cleanup_old_messages(session, conversation_id)
             
             # Enforce max messages limit
-            self._enforce_message_limit(session, conversation.id)
+            await self._enforce_message_limit(session, conversation_id)
             
             # Create new message
             message = Message(
-                conversation_id=conversation.id,
+                conversation_id=conversation_id,
                 role=role,
                 content=content,
                 extra_data=extra_data or {}
             )
             session.add(message)
-            session.flush()  # Flush to get message ID, but don't commit yet
+            await session.flush()  # Flush to get message ID, but don't commit yet
             
             # Update conversation metadata (count AFTER adding message)
-            conversation.last_updated = datetime.utcnow()
-            conversation.message_count = self._count_messages(session, conversation.id)
+            message_count = await self._update_conversation_metadata(session, conversation_id)
             
-            session.commit()
-            session.refresh(message)
-            session.refresh(conversation)  # Refresh conversation to get updated count
+            await session.commit()
             
             logger.info(
                 f"Added {role} message to conversation {cid}. "
-                f"Total messages: {conversation.message_count}"
+                f"Total messages: {message_count}"
             )
             
             return message
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def get_messages(
+    async def add_messages(
+        self,
+        cid: str,
+        items: List[Tuple[str, str, Optional[dict]]]
+    ) -> int:
+        """
+        Add several messages to a conversation in a single transaction.
+        
+        Args:
+            cid: Conversation ID
+            items: (role, content, extra_data) tuples in chronological order
+        
+        Returns:
+            Total number of messages in the conversation afterwards
+        """
+        if not items:
+            return 0
+        
+        session = self._get_session()
+        try:
+            # Create the conversation if needed, in the same transaction as the inserts
+            conversation_id = await self._upsert_conversation(session, cid)
+            
+            # Clean up old messages and make room for the new ones
+            await self._cleanup_old_messages(session, conversation_id)
+            await self._enforce_message_limit(session, conversation_id, incoming=len(items))
+            
+            messages = [
+                Message(
+                    conversation_id=conversation_id,
+                    role=role,
+                    content=content,
+                    extra_data=extra_data or {}
+                )
+                for role, content, extra_data in items
+            ]
+            session.add_all(messages)
+            await session.flush()
+            
+            message_count = await self._update_conversation_metadata(session, conversation_id)
+            
+            await session.commit()
+            
+            logger.info(
+                f"Added {len(messages)} messages to conversation {cid}. "
+                f"Total messages: {message_count}"
+            )
+            
+            return message_count
+        finally:
+            await self._close(session)
+    
+    async def get_messages(
         self,
         cid: str,
         limit: Optional[int] = None,
@@ -129,69 +182,129 @@ class ConversationRepository:
         """
         Get messages for a conversation.
         Returns most recent messages first.
+        
+        Messages past MAX_MESSAGE_AGE_DAYS are filtered out here; they are
+        deleted on the next write to the conversation.
         """
-        session = self._get_session()
+        cutoff_date = datetime.utcnow() - timedelta(days=self.MAX_MESSAGE_AGE_DAYS)
+        session = self._get_session(readonly=True)
         try:
-            conversation = self.get_conversation(cid)
+            conversation = await self._find_conversation(session, cid)
             if not conversation:
                 return []
             
-            # Clean up old messages
-            self._cleanup_old_messages(session, conversation.id)
-            
             # Query messages
             statement = (
                 select(Message)
-                .where(Message.conversation_id == conversation.id)
-                .order_by(Message.timestamp.desc())
+                .where(Message.conversation_id == conversation.id, Message.timestamp >= cutoff_date)
+                .order_by(Message.timestamp.desc(), Message.id.desc())
                 .offset(offset)
             )
             
             if limit:
                 statement = statement.limit(limit)
             
-            messages = session.exec(statement).all()
+            messages = (await session.exec(statement)).all()
             return list(reversed(messages))  # Return in chronological order
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def get_recent_messages(self, cid: str, count: int = 5) -> List[Dict]:
+    async def get_conversation_with_messages(self, cid: str, limit: int = 10) -> Optional[Dict]:
+        """
+        Get conversation timestamps and its most recent messages in one session.
+        
+        Args:
+            cid: Conversation ID
+            limit: Maximum number of messages to return
+        
+        Returns:
+            Dict with created_at, last_updated and messages (chronological order),
+            or None if the conversation does not exist
+        
+        Messages past MAX_MESSAGE_AGE_DAYS are filtered out here; they are
+        deleted on the next write to the conversation.
+        """
+        cutoff_date = datetime.utcnow() - timedelta(days=self.MAX_MESSAGE_AGE_DAYS)
+        session = self._get_session(readonly=True)
+        try:
+            conversation = await self._find_conversation(session, cid)
+            if not conversation:
+                return None
+            
+            statement = (
+                select(Message)
+                .where(Message.conversation_id == conversation.id, Message.timestamp >= cutoff_date)
+                .order_by(Message.timestamp.desc(), Message.id.desc())
+                .limit(limit)
+            )
+            messages = (await session.exec(statement)).all()
+            
+            return {
+                "created_at": conversation.created_at,
+                "last_updated": conversation.last_updated,
+                "messages": [
+                    {
+                        "role": msg.role,
+                        "content": msg.content,
+                        "timestamp": msg.timestamp.isoformat()
+                    }
+                    for msg in reversed(messages)
+                ]
+            }
+        finally:
+            await self._close(session)
+    
+    async def get_recent_messages(self, cid: str, count: int = 5) -> List[Dict]:
         """
         Get N most recent messages as dictionaries.
         Format suitable for LLM context.
+        
+        Selects only the needed columns (no ORM objects) in a single query.
+        Messages past MAX_MESSAGE_AGE_DAYS are filtered out here; they are
+        deleted on the next write to the conversation.
         """
-        messages = self.get_messages(cid, limit=count)
-        return [
-            {
-                "role": msg.role,
-                "content": msg.content,
-                "timestamp": msg.timestamp.isoformat()
-            }
-            for msg in messages
-        ]
+        cutoff_date = datetime.utcnow() - timedelta(days=self.MAX_MESSAGE_AGE_DAYS)
+        session = self._get_session(readonly=True)
+        try:
+            statement = (
+                select(Message.role, Message.content, Message.timestamp)
+                .join(Conversation, Message.conversation_id == Conversation.id)
+                .where(Conversation.cid == cid, Message.timestamp >= cutoff_date)
+                .order_by(Message.timestamp.desc(), Message.id.desc())
+                .limit(count)
+            )
+            rows = (await session.exec(statement)).all()
+            return [
+                {
+                    "role": role,
+                    "content": content,
+                    "timestamp": timestamp.isoformat()
+                }
+                for role, content, timestamp in reversed(rows)  # Chronological order
+            ]
+        finally:
+            await self._close(session)
     
-    def delete_conversation(self, cid: str) -> bool:
+    async def delete_conversation(self, cid: str) -> bool:
         """Delete conversation and all its messages."""
         session = self._get_session()
         try:
-            conversation = self.get_conversation(cid)
+            conversation = await self._find_conversation(session, cid)
             if not conversation:
                 return False
             
-            session.delete(conversation)
-            session.commit()
+            await session.delete(conversation)
+            await session.commit()
             logger.info(f"Deleted conversation: {cid}")
             return True
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def get_conversation_stats(self, cid: str) -> Optional[Dict]:
+    async def get_conversation_stats(self, cid: str) -> Optional[Dict]:
         """Get statistics for a conversation."""
-        session = self._get_session()
+        session = self._get_session(readonly=True)
         try:
-            conversation = self.get_conversation(cid)
+            conversation = await self._find_conversation(session, cid)
             if not conversation:
                 return None
             
@@ -210,24 +323,96 @@ class ConversationRepository:
                 ]
             }
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def get_all_conversations(self, limit: int = 100) -> List[Conversation]:
+    async def get_all_conversations(self, limit: int = 100) -> List[Conversation]:
         """Get all conversations (limited)."""
-        session = self._get_session()
+        session = self._get_session(readonly=True)
         try:
             statement = (
                 select(Conversation)
                 .order_by(Conversation.last_updated.desc())
                 .limit(limit)
             )
-            return list(session.exec(statement).all())
+            return list((await session.exec(statement)).all())
         finally:
-            if self._owns_session:
-                session.close()
+            await self._close(session)
     
-    def _cleanup_old_messages(self, session: Session, conversation_id: int):
+    async def get_all_conversation_stats(self, limit: int = 100) -> List[Dict]:
+        """
+        Get summary stats for the most recently updated conversations.
+        
+        Selects only the summary columns, so no Conversation objects (or their
+        eagerly loaded messages) are built.
+        
+        Args:
+            limit: Maximum number of conversations to return
+            
+        Returns:
+            List of dicts with cid, messages, created_at and last_updated
+        """
+        session = self._get_session(readonly=True)
+        try:
+            statement = (
+                select(
+                    Conversation.cid,
+                    Conversation.message_count,
+                    Conversation.created_at,
+                    Conversation.last_updated
+                )
+                .order_by(Conversation.last_updated.desc())
+                .limit(limit)
+            )
+            rows = (await session.exec(statement)).all()
+            return [
+                {
+                    "cid": row.cid,
+                    "messages": row.message_count,
+                    "created_at": row.created_at.isoformat(),
+                    "last_updated": row.last_updated.isoformat()
+                }
+                for row in rows
+            ]
+        finally:
+            await self._close(session)
+    
+    async def _upsert_conversation(self, session: AsyncSession, cid: str) -> int:
+        """
+        Insert the conversation row if it doesn't exist and return its ID.
+        
+        A single INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement, so
+        first-touch writes don't need a separate SELECT round trip. SQLite
+        before 3.35 has no RETURNING (SQLAlchemy clears insert_returning
+        there); it gets INSERT ... ON CONFLICT DO NOTHING followed by a SELECT
+        in the same transaction instead.
+        """
+        now = datetime.utcnow()
+        dialect = session.bind.dialect
+        insert = pg_insert if dialect.name == "postgresql" else sqlite_insert
+        statement = insert(Conversation).values(
+            cid=cid, created_at=now, last_updated=now, message_count=0
+        )
+        if dialect.insert_returning:
+            statement = statement.on_conflict_do_update(
+                index_elements=[Conversation.cid],
+                set_={"last_updated": now}
+            ).returning(Conversation.id)
+            return (await session.exec(statement)).scalar_one()
+        
+        await session.exec(statement.on_conflict_do_nothing(index_elements=[Conversation.cid]))
+        return (await session.exec(select(Conversation.id).where(Conversation.cid == cid))).one()
+    
+    async def _update_conversation_metadata(self, session: AsyncSession, conversation_id: int) -> int:
+        """Refresh last_updated and message_count for a conversation; returns the count."""
+        message_count = await self._count_messages(session, conversation_id)
+        await session.exec(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(last_updated=datetime.utcnow(), message_count=message_count)
+        )
+        return message_count
+    
+    async def _cleanup_old_messages(self, session: AsyncSession, conversation_id: int):
         """Remove messages older than MAX_MESSAGE_AGE_DAYS."""
         cutoff_date = datetime.utcnow() - timedelta(days=self.MAX_MESSAGE_AGE_DAYS)
         
@@ -236,26 +421,23 @@ class ConversationRepository:
             Message.timestamp < cutoff_date
         )
         
-        result = session.exec(statement)
+        result = await session.exec(statement)
         if result.rowcount > 0:
-            session.commit()
             logger.info(f"Cleaned up {result.rowcount} old messages from conversation {conversation_id}")
     
-    def _enforce_message_limit(self, session: Session, conversation_id: int):
-        """Enforce MAX_MESSAGES limit by deleting oldest messages."""
+    async def _enforce_message_limit(self, session: AsyncSession, conversation_id: int, incoming: int = 1):
+        """Enforce MAX_MESSAGES limit by deleting oldest messages, leaving room for `incoming` new ones."""
         # Count current messages
-        count_statement = select(func.count()).select_from(Message).where(
-            Message.conversation_id == conversation_id
-        )
-        count = session.exec(count_statement).one()
+        count = await self._count_messages(session, conversation_id)
+        keep = max(self.MAX_MESSAGES - incoming, 0)
         
-        if count >= self.MAX_MESSAGES:
-            # Get IDs of messages to delete (keep most recent MAX_MESSAGES-1)
+        if count > keep:
+            # Get IDs of messages to delete (keep most recent MAX_MESSAGES-incoming)
             messages_to_keep = (
                 select(Message.id)
                 .where(Message.conversation_id == conversation_id)
-                .order_by(Message.timestamp.desc())
-                .limit(self.MAX_MESSAGES - 1)
+                .order_by(Message.timestamp.desc(), Message.id.desc())
+                .limit(keep)
             )
             
             delete_statement = delete(Message).where(
@@ -263,14 +445,13 @@ class ConversationRepository:
                 Message.id.not_in(messages_to_keep)
             )
             
-            result = session.exec(delete_statement)
+            result = await session.exec(delete_statement)
             if result.rowcount > 0:
-                session.commit()
                 logger.info(f"Removed {result.rowcount} old messages to maintain limit")
     
-    def _count_messages(self, session: Session, conversation_id: int) -> int:
+    async def _count_messages(self, session: AsyncSession, conversation_id: int) -> int:
         """Count messages in a conversation."""
         statement = select(func.count()).select_from(Message).where(
             Message.conversation_id == conversation_id
         )
-        return session.exec(statement).one()
+        return (await session.exec(statement)).one()
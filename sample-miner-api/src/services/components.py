@@ -7,9 +7,19 @@ All components follow the same pattern:
 
 import json
 import logging
+import re
 import httpx
 import asyncio
-from typing import List, Optional
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 from src.models.models import (
     ComponentInput, 
@@ -18,12 +28,30 @@ from src.models.models import (
     InputItem, 
     PreviousOutput
 )
+from src.core.config import settings
 from src.services.llm_client import generate_response, get_llm_client
+from src.services.redis_service import get_redis_service
 from src.core.conversation import ConversationContext
 from src.services.playbook_service import PlaybookService
+from src.utils.cache import TTLCache
+from src.utils.locks import KeyedLock
+from src.utils.task_hash import generate_task_hash
 
 logger = logging.getLogger(__name__)
 
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception whichever parser is in use
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    
+    def _json_dumps_indented(value) -> str:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps_indented(value) -> str:
+        return json.dumps(value, indent=2)
+
 # Initialize playbook service (will be set up when first used)
 _playbook_service = None
 
@@ -37,6 +65,43 @@ def get_playbook_service() -> PlaybookService:
     return _playbook_service
 
 
+async def _resolved(value):
+    """Awaitable placeholder for a fetch that was skipped."""
+    return value
+
+
+def _discard_task(task: asyncio.Task) -> None:
+    """Cancel a speculative task whose result is no longer needed."""
+    task.cancel()
+    # Retrieve any exception so asyncio doesn't log it as never retrieved
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _load_playbook_context(component_input: ComponentInput, component_name: str) -> str:
+    """
+    Load and format the playbook context for a component, if enabled.
+    
+    Playbook problems never fail the request: any error is logged and the
+    component runs without playbook context.
+    
+    Returns:
+        Formatted playbook context (with leading blank lines), or "" if the
+        playbook is disabled, empty or failed to load
+    """
+    if not component_input.use_playbook:
+        logger.info(f"[{component_name}] Playbook disabled")
+        return ""
+    try:
+        playbook_service = get_playbook_service()
+        playbook_entries = await playbook_service.get_playbook(component_input.cid)
+        if playbook_entries:
+            logger.info(f"[{component_name}] Using playbook: {len(playbook_entries)} entries")
+            return "\n\n" + playbook_service.format_playbook_context(playbook_entries)
+    except Exception as e:
+        logger.warning(f"[{component_name}] Failed to load playbook: {e}")
+    return ""
+
+
 async def get_context_additions(
     component_input: ComponentInput,
     context: ConversationContext,
@@ -53,32 +118,28 @@ async def get_context_additions(
     Returns:
         Tuple of (conversation_history, playbook_context_string)
     """
-    # Get conversation history if enabled
-    conversation_history = []
-    if component_input.use_conversation_history:
-        conversation_history = await context.get_recent_messages(count=5)
+    use_history = component_input.use_conversation_history
+    
+    # History (conversation DB) and playbook (playbook DB) are independent
+    # reads, so fetch them concurrently
+    conversation_history, playbook_context = await asyncio.gather(
+        context.get_recent_messages(count=5) if use_history else _resolved([]),
+        _load_playbook_context(component_input, component_name)
+    )
+    
+    if use_history:
         logger.info(f"[{component_name}] Using conversation history: {len(conversation_history)} messages")
     else:
         logger.info(f"[{component_name}] Conversation history disabled")
     
-    # Get playbook context if enabled
-    playbook_context = ""
-    if component_input.use_playbook:
-        try:
-            playbook_service = get_playbook_service()
-            playbook_entries = await playbook_service.get_playbook(component_input.cid)
-            if playbook_entries:
-                playbook_context = "\n\n" + playbook_service.format_playbook_context(playbook_entries)
-                logger.info(f"[{component_name}] Using playbook: {len(playbook_entries)} entries")
-        except Exception as e:
-            logger.warning(f"[{component_name}] Failed to load playbook: {e}")
-            playbook_context = ""  # Ensure empty string on failure
-    else:
-        logger.info(f"[{component_name}] Playbook disabled")
-    
     return conversation_history, playbook_context
 
 
+def _join_items(items: list) -> str:
+    """Join notebook list items with blank lines, converting non-strings."""
+    return "\n\n".join([item if type(item) is str else str(item) for item in items])
+
+
 def _extract_notebook_content(notebook_value, component_name: str) -> str:
     """
     Extract notebook content from various formats (dict, JSON string, etc.).
@@ -90,45 +151,42 @@ def _extract_notebook_content(notebook_value, component_name: str) -> str:
     Returns:
         Notebook content as a string
     """
+    if isinstance(notebook_value, str):
+        # Check if notebook is a JSON-encoded string (double-encoded)
+        notebook_stripped = notebook_value.strip()
+        if not (notebook_stripped.startswith(("{", "[")) and notebook_stripped.endswith(("}", "]"))):
+            return notebook_value
+        try:
+            # Parsed value is always a dict or list, handled below
+            notebook_value = _json_loads(notebook_stripped)
+        except json.JSONDecodeError:
+            # Not valid JSON, keep as-is
+            logger.debug(f"[{component_name}] Notebook string looks like JSON but failed to parse, keeping as-is")
+            return notebook_value
+    
     if isinstance(notebook_value, dict):
         # If it's a dict with 'content' field, extract that
         if "content" in notebook_value:
             content = notebook_value["content"]
             # If content is a list, join it
             if isinstance(content, list):
-                return "\n\n".join(str(item) for item in content)
-            return str(content)
-        # If it's a dict with 'title' and 'content', prefer content
-        elif "title" in notebook_value and "content" in notebook_value:
-            content = notebook_value["content"]
-            if isinstance(content, list):
-                return "\n\n".join(str(item) for item in content)
+                return _join_items(content)
             return str(content)
         # Otherwise, convert dict to formatted JSON string
         logger.info(f"[{component_name}] Notebook is dict, converting to JSON string")
-        return json.dumps(notebook_value, indent=2)
-    elif isinstance(notebook_value, str):
-        # Check if notebook is a JSON-encoded string (double-encoded)
-        notebook_stripped = notebook_value.strip()
-        if notebook_stripped.startswith(("{", "[")) and notebook_stripped.endswith(("}", "]")):
-            try:
-                # Try to parse the JSON string
-                parsed_notebook = json.loads(notebook_value)
-                # Recursively extract content
-                return _extract_notebook_content(parsed_notebook, component_name)
-            except json.JSONDecodeError:
-                # Not valid JSON, keep as-is
-                logger.debug(f"[{component_name}] Notebook string looks like JSON but failed to parse, keeping as-is")
-                return notebook_value
-        return notebook_value
+        return _json_dumps_indented(notebook_value)
     elif isinstance(notebook_value, list):
         # If it's a list, join items
-        return "\n\n".join(str(item) for item in notebook_value)
+        return _join_items(notebook_value)
     else:
         # Convert to string
         return str(notebook_value)
 
 
+# A ```json (or bare ```) fenced block whose body is a JSON object or array
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```", re.DOTALL)
+
+
 def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
     """
     Parse JSON response from LLM, handling various formats.
@@ -150,8 +208,12 @@ def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
         if not (value_stripped.startswith("{") and value_stripped.endswith("}")):
             return None, None
         
+        # Substring checks are far cheaper than a parse and rule out almost every value
+        if '"immediate_response"' not in value_stripped and '"notebook"' not in value_stripped:
+            return None, None
+        
         try:
-            parsed = json.loads(value)
+            parsed = _json_loads(value_stripped)
             if isinstance(parsed, dict):
                 inner_immediate = parsed.get("immediate_response")
                 inner_notebook = parsed.get("notebook")
@@ -166,24 +228,12 @@ def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
         # Try to extract JSON from response (handle markdown code blocks and extra text)
         response_text = response.strip()
         
-        # Strategy 1: Try to find JSON in markdown code blocks
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            # Try to find any code block that might contain JSON
-            parts = response_text.split("```")
-            for i in range(1, len(parts), 2):  # Check every other part (code blocks)
-                try:
-                    test_text = parts[i].strip()
-                    # Remove language identifier if present
-                    if test_text.startswith("json"):
-                        test_text = test_text[4:].strip()
-                    # Try to parse
-                    json.loads(test_text)
-                    response_text = test_text
-                    break
-                except (json.JSONDecodeError, IndexError):
-                    continue
+        # Strategy 1: Try to find JSON in markdown code blocks (skipped when
+        # the model already returned bare JSON)
+        if not response_text.startswith("{"):
+            fence_match = _JSON_FENCE.search(response_text)
+            if fence_match:
+                response_text = fence_match.group(1)
         
         # Strategy 2: Try to find JSON object boundaries in the text
         if not response_text.startswith("{"):
@@ -194,7 +244,7 @@ def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
                 response_text = response_text[first_brace:last_brace + 1]
         
         # Strategy 3: Try parsing as-is
-        result = json.loads(response_text)
+        result = _json_loads(response_text)
         immediate_response = result.get("immediate_response", response)
         notebook_output = result.get("notebook", "no update")
         
@@ -230,7 +280,7 @@ def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
             try:
                 json_text = strategy()
                 if json_text:
-                    result = json.loads(json_text)
+                    result = _json_loads(json_text)
                     immediate_response = result.get("immediate_response", response)
                     notebook_output = result.get("notebook", "no update")
                     
@@ -256,220 +306,377 @@ def parse_json_response(response: str, component_name: str) -> tuple[str, str]:
         return response, "no update"
 
 
+# Only brace positions matter for matching, so let the regex engine skip
+# everything in between instead of stepping through each character
+_BRACES = re.compile(r"[{}]")
+
+
 def _find_last_json_object(text: str) -> Optional[str]:
     """Find the last complete JSON object in text by matching braces."""
-    if "}" not in text:
+    last_brace = text.rfind("}")
+    if last_brace == -1:
         return None
     
-    last_brace = text.rfind("}")
     depth = 0
-    start_pos = last_brace
     
     # Find matching opening brace
-    for i in range(last_brace, -1, -1):
-        if text[i] == "}":
+    for match in reversed(list(_BRACES.finditer(text, 0, last_brace + 1))):
+        if match.group() == "}":
             depth += 1
-        elif text[i] == "{":
+        else:
             depth -= 1
             if depth == 0:
-                return text[i:last_brace + 1]
+                return text[match.start():last_brace + 1]
     
     return None
 
 
 def _find_first_json_object(text: str) -> Optional[str]:
     """Find the first complete JSON object in text by matching braces."""
-    if "{" not in text:
+    first_brace = text.find("{")
+    if first_brace == -1:
         return None
     
-    first_brace = text.find("{")
     depth = 0
-    start_pos = first_brace
     
     # Find matching closing brace
-    for i in range(first_brace, len(text)):
-        if text[i] == "{":
+    for match in _BRACES.finditer(text, first_brace):
+        if match.group() == "{":
             depth += 1
-        elif text[i] == "}":
+        else:
             depth -= 1
             if depth == 0:
-                return text[first_brace:i + 1]
+                return text[first_brace:match.end()]
     
     return None
 
 
+def _resolve_notebook(
+    notebook_output: str,
+    previous_outputs: Optional[List[PreviousOutput]],
+    component_name: str
+) -> str:
+    """
+    Replace a "no update" notebook with the first real notebook among previous outputs.
+    
+    Args:
+        notebook_output: Notebook returned by the LLM
+        previous_outputs: Outputs passed in with the request
+        component_name: Name of component (for logging)
+        
+    Returns:
+        The previous notebook, or notebook_output unchanged if there is nothing to resolve
+    """
+    if notebook_output != "no update" or not previous_outputs:
+        return notebook_output
+    
+    source = None
+    for prev in previous_outputs:
+        notebook = prev.output.notebook
+        if notebook and notebook != "no update":
+            source = prev
+            break
+    
+    return _use_previous_notebook(notebook_output, source, component_name)
 
 
-async def component_complete(
+def _use_previous_notebook(
+    notebook_output: str,
+    source: Optional[PreviousOutput],
+    component_name: str
+) -> str:
+    """
+    Replace a "no update" notebook with source's notebook, when a source was found.
+    
+    For callers that already located the first previous output with a real
+    notebook while walking previous_outputs for another reason.
+    
+    Args:
+        notebook_output: Notebook returned by the LLM
+        source: First previous output with a real notebook, or None
+        component_name: Name of component (for logging)
+        
+    Returns:
+        The resolved notebook
+    """
+    if notebook_output != "no update":
+        return notebook_output
+    
+    if source is None:
+        logger.info(f"[{component_name}] No previous notebook found to resolve - keeping 'no update'")
+        return notebook_output
+    
+    logger.info(f"[{component_name}] Resolved 'no update' to previous notebook from [{source.component}]")
+    return source.output.notebook
+
+
+# Shape of every JSON component reply (notebook is "no update" when unchanged)
+_COMPONENT_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "immediate_response": {"type": "string"},
+        "notebook": {"type": "string"}
+    },
+    "required": ["immediate_response", "notebook"],
+    "additionalProperties": False
+}
+
+
+def _json_response_format() -> dict:
+    """
+    Response format for components that reply with immediate_response/notebook JSON.
+    
+    Returns:
+        A strict json_schema format when LLM_JSON_SCHEMA is enabled, else plain JSON mode
+    """
+    if settings.llm_json_schema:
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "component_output",
+                "strict": True,
+                "schema": _COMPONENT_OUTPUT_SCHEMA
+            }
+        }
+    return {"type": "json_object"}
+
+
+# Strong references to fire-and-forget tasks; the event loop only keeps weak ones
+_background_tasks: set = set()
+
+
+def _run_in_background(coro) -> None:
+    """Schedule a coroutine without awaiting it, keeping it alive until done."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def wait_for_background_tasks() -> None:
+    """Let pending background writes finish (called on shutdown before Redis closes)."""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
+async def _store_and_log(
+    redis_service,
+    task_hash: str,
+    solution: dict,
+    ttl: int,
+    component_name: str,
+    label: str = "result"
+) -> None:
+    """Store a parent miner's output in Redis for its children and log the outcome."""
+    success = await redis_service.store_solution(task_hash=task_hash, solution=solution, ttl=ttl)
+    if success:
+        logger.info(f"[{component_name}] ✅ Parent stored {label} in Redis")
+    else:
+        logger.warning(f"[{component_name}] ⚠️ Failed to store {label} in Redis")
+
+
+# Payloads larger than this (in characters) are hashed/parsed in a worker thread
+# so one large request doesn't stall the event loop for everyone else
+CPU_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+async def _run_cpu_bound(size: int, func, *args):
+    """
+    Run a CPU-bound helper inline for small payloads, or in a thread for large ones.
+    
+    Args:
+        size: Approximate payload size in characters
+        func: Synchronous function to call
+        *args: Arguments for func
+        
+    Returns:
+        Whatever func returns
+    """
+    if size > CPU_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+@dataclass(frozen=True)
+class ComponentSpec:
+    """
+    The parts that differ between the LLM components sharing _run_component.
+    
+    Attributes:
+        name: Component name, used in logs and on the returned output
+        system_prompt: Static system prompt
+        playbook_heading: Text placed before playbook context in the system prompt
+        build_prompt: Returns (task prompt, user side of the stored conversation turn)
+        json_output: Whether the LLM answers with immediate_response/notebook JSON;
+            otherwise the whole reply is the response and the notebook is untouched
+        result_label: What the shared Redis result is called in logs
+    """
+    name: str
+    system_prompt: str
+    playbook_heading: str
+    build_prompt: Callable[[ComponentInput], Tuple[str, str]]
+    json_output: bool = True
+    result_label: str = "result"
+
+
+def _format_queries(inputs: List[InputItem]) -> str:
+    """Number the input queries for inclusion in a prompt."""
+    return "\n\n".join([f"Query {idx}: {item.user_query}" for idx, item in enumerate(inputs, 1)])
+
+
+def _format_previous_outputs(previous_outputs: Optional[List[PreviousOutput]], heading: str) -> str:
+    """
+    Render previous outputs (response and any real notebook) under a heading.
+    
+    Args:
+        previous_outputs: Outputs passed in with the request
+        heading: Section heading, e.g. "Previous outputs to refine:"
+        
+    Returns:
+        The prompt section, or "" when there are no previous outputs
+    """
+    if not previous_outputs:
+        return ""
+    
+    parts = [f"\n\n{heading}\n"]
+    for prev in previous_outputs:
+        output = prev.output
+        notebook = output.notebook
+        parts.append(f"\n[{prev.component}] {prev.task}:\n  Response: {output.immediate_response}\n")
+        if notebook and notebook != "no update":
+            parts.append(f"  Notebook: {notebook}\n")
+    return "".join(parts)
+
+
+async def _run_component(
+    spec: ComponentSpec,
     component_input: ComponentInput,
     context: ConversationContext
 ) -> ComponentOutput:
     """
-    Complete component: Process tasks with optional conversation history and playbook.
+    Run an LLM-backed component described by spec.
     
     Supports three miner types:
-    - parent: Solves with LLM and stores solution in Redis
-    - child: Waits for and fetches solution from Redis (no LLM call)
-    - normal: Solves with LLM independently (no Redis)
+    - parent: Runs the LLM and stores the result in Redis for children
+    - child: Waits for and fetches the parent's result from Redis (no LLM call),
+      falling back to the LLM on timeout
+    - normal: Runs the LLM independently (no Redis)
     
     Args:
+        spec: Prompts and output handling for the component
         component_input: Unified component input
         context: Conversation context with history
         
     Returns:
-        ComponentOutput with the completed task
+        ComponentOutput for the component
     """
-    from src.core.config import settings
-    from src.utils.task_hash import generate_task_hash
-    
+    name = spec.name
+    label = spec.result_label
     miner_type = settings.miner_type
-    logger.info(f"[complete] Processing task as {miner_type} miner: {component_input.task}")
+    logger.info(f"[{name}] Processing task as {miner_type} miner: {component_input.task}")
     
     # Generate task hash for Redis key
-    task_hash = generate_task_hash(component_input.task, component_input.input)
-    logger.info(f"[complete] Task hash: {task_hash[:16]}...")
+    input_size = len(component_input.task) + sum(len(item.user_query) for item in component_input.input)
+    task_hash = await _run_cpu_bound(
+        input_size, generate_task_hash, component_input.task, component_input.input
+    )
+    logger.info(f"[{name}] Task hash: {task_hash[:16]}...")
     
-    # CHILD MINER: Wait for parent's solution in Redis
+    # CHILD MINER: Wait for parent's result in Redis
+    context_task = None
     if miner_type == "child":
-        logger.info(f"[complete] Child miner waiting for parent solution...")
-        from src.services.redis_service import get_redis_service
-        
+        logger.info(f"[{name}] Child miner waiting for parent {label}...")
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
-            # Wait for solution from parent
-            solution = await redis_service.wait_for_solution(
-                task_hash=task_hash,
-                timeout=settings.redis_wait_timeout
+            # Load history/playbook while we wait so the LLM fallback
+            # doesn't pay for it after a timeout
+            context_task = asyncio.create_task(
+                get_context_additions(component_input, context, name)
             )
+            try:
+                # Wait for result from parent
+                result = await redis_service.wait_for_solution(
+                    task_hash=task_hash,
+                    timeout=settings.redis_wait_timeout
+                )
+            except BaseException:
+                _discard_task(context_task)
+                raise
             
-            if solution:
-                logger.info(f"[complete] ✅ Child received solution from parent")
-                # Return the parent's solution
+            if result:
+                _discard_task(context_task)
+                logger.info(f"[{name}] ✅ Child received {label} from parent")
+                # Return the parent's result
                 return ComponentOutput(
                     cid=component_input.cid,
                     task=component_input.task,
                     input=component_input.input,
                     output=ComponentOutputData(
-                        immediate_response=solution.get("immediate_response", ""),
-                        notebook=solution.get("notebook", "no update")
+                        immediate_response=result.get("immediate_response", ""),
+                        notebook=result.get("notebook", "no update")
                     ),
-                    component="complete"
+                    component=name
                 )
             else:
-                logger.warning(f"[complete] ⏰ Timeout waiting for parent solution, falling back to LLM")
+                logger.warning(f"[{name}] ⏰ Timeout waiting for parent {label}, falling back to LLM")
                 # Fall through to normal processing
         else:
-            logger.error(f"[complete] ❌ Redis not available for child miner, falling back to LLM")
+            logger.error(f"[{name}] ❌ Redis not available for child miner, falling back to LLM")
             # Fall through to normal processing
     
-    # Build input text from all input items
-    input_text_parts = []
-    for idx, item in enumerate(component_input.input, 1):
-        input_text_parts.append(f"Query {idx}: {item.user_query}")
-    
-    input_text = "\n\n".join(input_text_parts)
-    
-    # Build previous outputs context - LLM will read everything and decide intelligently
-    previous_context = ""
-    if component_input.previous_outputs:
-        previous_context = "\n\nPrevious component outputs:\n"
-        for prev in component_input.previous_outputs:
-            # Show the complete output with immediate_response and notebook
-            previous_context += f"\n[{prev.component}] {prev.task}:\n"
-            previous_context += f"  Response: {prev.output.immediate_response}\n"
-            if prev.output.notebook and prev.output.notebook != "no update":
-                previous_context += f"  Notebook: {prev.output.notebook}\n"
+    task_prompt, turn_text = spec.build_prompt(component_input)
     
-    # Get conversation history and playbook context
-    conversation_history, playbook_context = await get_context_additions(
-        component_input, context, "complete"
+    # Get conversation history and playbook context (already in flight for a child miner)
+    conversation_history, playbook_context = await (
+        context_task or get_context_additions(component_input, context, name)
     )
     
-    # Build system prompt with Canvas-style instructions
-    system_prompt = """You are an intelligent AI assistant that helps users complete tasks.
-
-CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
-
-Required JSON format:
-{
-  "immediate_response": "Your natural language explanation of what you did or your answer",
-  "notebook": "Updated notebook content OR 'no update'"
-}
-
-Guidelines for notebook field:
-- If task is conversational only: Return "no update"
-- If there's ONE notebook and no changes needed: Return "no update"
-- If there's ONE notebook and changes needed: Return the updated version
-- If there are MULTIPLE notebooks: You MUST create new content (combine/choose/merge) - NEVER "no update"
-- If creating new notebook: Return the full content
-
-Your response must be ONLY the JSON object, nothing else."""
-    
+    # Playbook context is sent as a separate suffix so the static system prompt
+    # stays a byte-identical prefix the provider can cache
+    system_prompt_suffix = None
     if playbook_context:
-        system_prompt += f"\n\nUser preferences and context:\n{playbook_context}"
-    
-    # Build task prompt
-    task_prompt = f"""Task: {component_input.task}
-
-Input:
-{input_text}
-{previous_context}
-
-Complete this task and respond in JSON format."""
+        system_prompt_suffix = f"{spec.playbook_heading}{playbook_context}"
     
     # Generate response with optional conversation history
     response = await generate_response(
         prompt=task_prompt,
-        system_prompt=system_prompt,
+        system_prompt=spec.system_prompt,
+        system_prompt_suffix=system_prompt_suffix,
+        cache_system_prompt=True,
         conversation_history=conversation_history,
         temperature=0.7,
-        response_format={"type": "json_object"}
+        response_format=_json_response_format() if spec.json_output else None
     )
     
-    # Parse JSON response
-    immediate_response, notebook_output = parse_json_response(response, "complete")
-    
-    # Resolve "no update" for notebook - return previous notebook if exists
-    if notebook_output == "no update" and component_input.previous_outputs:
-        resolved = False
-        for prev in component_input.previous_outputs:
-            if prev.output.notebook and prev.output.notebook != "no update":
-                notebook_output = prev.output.notebook
-                logger.info(f"[complete] Resolved 'no update' to previous notebook from [{prev.component}]")
-                resolved = True
-                break
-        
-        if not resolved:
-            logger.info(f"[complete] No previous notebook found to resolve - keeping 'no update'")
+    if spec.json_output:
+        # Parse JSON response
+        immediate_response, notebook_output = await _run_cpu_bound(
+            len(response), parse_json_response, response, name
+        )
+        # Resolve "no update" for notebook - return previous notebook if exists
+        notebook_output = _resolve_notebook(notebook_output, component_input.previous_outputs, name)
+    else:
+        # Conversational output - no notebook editing
+        immediate_response, notebook_output = response, "no update"
     
     # Store in conversation history
-    await context.add_user_message(f"Task: {component_input.task}\n{input_text}")
-    await context.add_assistant_message(immediate_response)
+    await context.add_turn(turn_text, immediate_response)
     
-    # PARENT MINER: Store solution in Redis for children
+    # PARENT MINER: Store result in Redis for children
     if miner_type == "parent":
-        logger.info(f"[complete] Parent miner storing solution in Redis...")
-        from src.services.redis_service import get_redis_service
-        
+        logger.info(f"[{name}] Parent miner storing {label} in Redis...")
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
-            solution_data = {
+            result_data = {
                 "immediate_response": immediate_response,
                 "notebook": notebook_output
             }
             
-            success = await redis_service.store_solution(
-                task_hash=task_hash,
-                solution=solution_data,
-                ttl=settings.redis_solution_ttl
-            )
-            
-            if success:
-                logger.info(f"[complete] ✅ Parent stored solution in Redis")
-            else:
-                logger.warning(f"[complete] ⚠️ Failed to store solution in Redis")
+            # Children poll for this, but our caller doesn't need to wait for the write
+            _run_in_background(_store_and_log(
+                redis_service, task_hash, result_data, settings.redis_solution_ttl, name, label
+            ))
         else:
-            logger.warning(f"[complete] ⚠️ Redis not available for parent miner")
+            logger.warning(f"[{name}] ⚠️ Redis not available for parent miner")
     
     return ComponentOutput(
         cid=component_input.cid,
@@ -479,96 +686,79 @@ Complete this task and respond in JSON format."""
             immediate_response=immediate_response,
             notebook=notebook_output  # Resolved: new content, previous notebook, or "no update"
         ),
-        component="complete"
+        component=name
     )
 
 
-async def component_refine(
+_SYSTEM_PROMPT_COMPLETE = """You are an intelligent AI assistant that helps users complete tasks.
+
+CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
+
+Required JSON format:
+{
+  "immediate_response": "Your natural language explanation of what you did or your answer",
+  "notebook": "Updated notebook content OR 'no update'"
+}
+
+Guidelines for notebook field:
+- If task is conversational only: Return "no update"
+- If there's ONE notebook and no changes needed: Return "no update"
+- If there's ONE notebook and changes needed: Return the updated version
+- If there are MULTIPLE notebooks: You MUST create new content (combine/choose/merge) - NEVER "no update"
+- If creating new notebook: Return the full content
+
+Your response must be ONLY the JSON object, nothing else."""
+
+
+def _build_complete_prompt(component_input: ComponentInput) -> Tuple[str, str]:
+    """Build the complete prompt and the conversation turn it is stored as."""
+    input_text = _format_queries(component_input.input)
+    # LLM reads every previous output (response and notebook) and decides what to use
+    previous_context = _format_previous_outputs(
+        component_input.previous_outputs, "Previous component outputs:"
+    )
+    task_prompt = f"""Task: {component_input.task}
+
+Input:
+{input_text}
+{previous_context}
+
+Complete this task and respond in JSON format."""
+    return task_prompt, f"Task: {component_input.task}\n{input_text}"
+
+
+_SPEC_COMPLETE = ComponentSpec(
+    name="complete",
+    system_prompt=_SYSTEM_PROMPT_COMPLETE,
+    playbook_heading="\n\nUser preferences and context:\n",
+    build_prompt=_build_complete_prompt,
+    result_label="solution"
+)
+
+
+async def component_complete(
     component_input: ComponentInput,
     context: ConversationContext
 ) -> ComponentOutput:
     """
-    Refine component: Improve outputs with optional conversation history and playbook.
+    Complete component: Process tasks with optional conversation history and playbook.
     
     Supports three miner types:
-    - parent: Refines with LLM and stores result in Redis
-    - child: Waits for and fetches result from Redis (no LLM call)
-    - normal: Refines with LLM independently (no Redis)
+    - parent: Solves with LLM and stores solution in Redis
+    - child: Waits for and fetches solution from Redis (no LLM call)
+    - normal: Solves with LLM independently (no Redis)
     
     Args:
-        component_input: Unified component input with previous outputs to refine
-        context: Conversation context
+        component_input: Unified component input
+        context: Conversation context with history
         
     Returns:
-        ComponentOutput with refined output
+        ComponentOutput with the completed task
     """
-    from src.core.config import settings
-    from src.utils.task_hash import generate_task_hash
-    
-    miner_type = settings.miner_type
-    logger.info(f"[refine] Processing task as {miner_type} miner: {component_input.task}")
-    
-    # Generate task hash for Redis key
-    task_hash = generate_task_hash(component_input.task, component_input.input)
-    logger.info(f"[refine] Task hash: {task_hash[:16]}...")
-    
-    # CHILD MINER: Wait for parent's result in Redis
-    if miner_type == "child":
-        logger.info(f"[refine] Child miner waiting for parent result...")
-        from src.services.redis_service import get_redis_service
-        
-        redis_service = get_redis_service()
-        if redis_service and redis_service.client:
-            # Wait for result from parent
-            result = await redis_service.wait_for_solution(
-                task_hash=task_hash,
-                timeout=settings.redis_wait_timeout
-            )
-            
-            if result:
-                logger.info(f"[refine] ✅ Child received result from parent")
-                # Return the parent's result
-                return ComponentOutput(
-                    cid=component_input.cid,
-                    task=component_input.task,
-                    input=component_input.input,
-                    output=ComponentOutputData(
-                        immediate_response=result.get("immediate_response", ""),
-                        notebook=result.get("notebook", "no update")
-                    ),
-                    component="refine"
-                )
-            else:
-                logger.warning(f"[refine] ⏰ Timeout waiting for parent result, falling back to LLM")
-                # Fall through to normal processing
-        else:
-            logger.error(f"[refine] ❌ Redis not available for child miner, falling back to LLM")
-            # Fall through to normal processing
-    
-    # Build input text
-    input_text_parts = []
-    for idx, item in enumerate(component_input.input, 1):
-        input_text_parts.append(f"Query {idx}: {item.user_query}")
-    
-    input_text = "\n\n".join(input_text_parts)
-    
-    # Build previous outputs context - LLM will read everything and decide intelligently
-    previous_outputs_text = ""
-    if component_input.previous_outputs:
-        previous_outputs_text = "\n\nPrevious outputs to refine:\n"
-        for prev in component_input.previous_outputs:
-            previous_outputs_text += f"\n[{prev.component}] {prev.task}:\n"
-            previous_outputs_text += f"  Response: {prev.output.immediate_response}\n"
-            if prev.output.notebook and prev.output.notebook != "no update":
-                previous_outputs_text += f"  Notebook: {prev.output.notebook}\n"
-    
-    # Get conversation history and playbook context
-    conversation_history, playbook_context = await get_context_additions(
-        component_input, context, "refine"
-    )
-    
-    # Build system prompt with Canvas-style instructions
-    system_prompt = """You are an AI assistant that refines and improves outputs.
+    return await _run_component(_SPEC_COMPLETE, component_input, context)
+
+
+_SYSTEM_PROMPT_REFINE = """You are an AI assistant that refines and improves outputs.
 
 CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
 
@@ -585,169 +775,62 @@ Guidelines for notebook field:
 - If there are MULTIPLE notebooks: You MUST create new content (refine one, combine, or merge) - NEVER "no update"
 
 Your response must be ONLY the JSON object, nothing else."""
-    
-    if playbook_context:
-        system_prompt += f"\n\nUser preferences:\n{playbook_context}"
-    
-    # Build refine prompt
+
+
+def _build_refine_prompt(component_input: ComponentInput) -> Tuple[str, str]:
+    """Build the refine prompt and the conversation turn it is stored as."""
+    input_text = _format_queries(component_input.input)
+    previous_outputs_text = _format_previous_outputs(
+        component_input.previous_outputs, "Previous outputs to refine:"
+    )
     refine_prompt = f"""Task: {component_input.task}
 
 Original Input:
 {input_text}
-{previous_outputs_text}
-
-Refine and improve the outputs. Respond in JSON format."""
-    
-    # Generate response
-    response = await generate_response(
-        prompt=refine_prompt,
-        system_prompt=system_prompt,
-        conversation_history=conversation_history,
-        temperature=0.7,
-        response_format={"type": "json_object"}
-    )
-    
-    # Parse JSON response
-    immediate_response, notebook_output = parse_json_response(response, "refine")
-    
-    # Resolve "no update" for notebook - return previous notebook if exists
-    if notebook_output == "no update" and component_input.previous_outputs:
-        resolved = False
-        for prev in component_input.previous_outputs:
-            if prev.output.notebook and prev.output.notebook != "no update":
-                notebook_output = prev.output.notebook
-                logger.info(f"[refine] Resolved 'no update' to previous notebook from [{prev.component}]")
-                resolved = True
-                break
-        
-        if not resolved:
-            logger.info(f"[refine] No previous notebook found to resolve - keeping 'no update'")
-    
-    # Store in conversation history
-    await context.add_user_message(f"Refine task: {component_input.task}")
-    await context.add_assistant_message(immediate_response)
-    
-    # PARENT MINER: Store result in Redis for children
-    if miner_type == "parent":
-        logger.info(f"[refine] Parent miner storing result in Redis...")
-        from src.services.redis_service import get_redis_service
-        
-        redis_service = get_redis_service()
-        if redis_service and redis_service.client:
-            result_data = {
-                "immediate_response": immediate_response,
-                "notebook": notebook_output
-            }
-            
-            success = await redis_service.store_solution(
-                task_hash=task_hash,
-                solution=result_data,
-                ttl=settings.redis_solution_ttl
-            )
-            
-            if success:
-                logger.info(f"[refine] ✅ Parent stored result in Redis")
-            else:
-                logger.warning(f"[refine] ⚠️ Failed to store result in Redis")
-        else:
-            logger.warning(f"[refine] ⚠️ Redis not available for parent miner")
-    
-    return ComponentOutput(
-        cid=component_input.cid,
-        task=component_input.task,
-        input=component_input.input,
-        output=ComponentOutputData(
-            immediate_response=immediate_response,
-            notebook=notebook_output  # Resolved: refined content, previous notebook, or "no update"
-        ),
-        component="refine"
-    )
+{previous_outputs_text}
+
+Refine and improve the outputs. Respond in JSON format."""
+    return refine_prompt, f"Refine task: {component_input.task}"
 
 
-async def component_feedback(
+_SPEC_REFINE = ComponentSpec(
+    name="refine",
+    system_prompt=_SYSTEM_PROMPT_REFINE,
+    playbook_heading="\n\nUser preferences:\n",
+    build_prompt=_build_refine_prompt
+)
+
+
+async def component_refine(
     component_input: ComponentInput,
     context: ConversationContext
 ) -> ComponentOutput:
     """
-    Feedback component: Analyze outputs and provide structured feedback.
+    Refine component: Improve outputs with optional conversation history and playbook.
     
     Supports three miner types:
-    - parent: Analyzes with LLM and stores result in Redis
+    - parent: Refines with LLM and stores result in Redis
     - child: Waits for and fetches result from Redis (no LLM call)
-    - normal: Analyzes with LLM independently (no Redis)
+    - normal: Refines with LLM independently (no Redis)
     
     Args:
-        component_input: Unified component input with outputs to analyze
+        component_input: Unified component input with previous outputs to refine
         context: Conversation context
         
     Returns:
-        ComponentOutput with structured feedback
+        ComponentOutput with refined output
     """
-    from src.core.config import settings
-    from src.utils.task_hash import generate_task_hash
-    
-    miner_type = settings.miner_type
-    logger.info(f"[feedback] Processing task as {miner_type} miner: {component_input.task}")
-    
-    # Generate task hash for Redis key
-    task_hash = generate_task_hash(component_input.task, component_input.input)
-    logger.info(f"[feedback] Task hash: {task_hash[:16]}...")
-    
-    # CHILD MINER: Wait for parent's result in Redis
-    if miner_type == "child":
-        logger.info(f"[feedback] Child miner waiting for parent result...")
-        from src.services.redis_service import get_redis_service
-        
-        redis_service = get_redis_service()
-        if redis_service and redis_service.client:
-            # Wait for result from parent
-            result = await redis_service.wait_for_solution(
-                task_hash=task_hash,
-                timeout=settings.redis_wait_timeout
-            )
-            
-            if result:
-                logger.info(f"[feedback] ✅ Child received result from parent")
-                # Return the parent's result
-                return ComponentOutput(
-                    cid=component_input.cid,
-                    task=component_input.task,
-                    input=component_input.input,
-                    output=ComponentOutputData(
-                        immediate_response=result.get("immediate_response", ""),
-                        notebook=result.get("notebook", "no update")
-                    ),
-                    component="feedback"
-                )
-            else:
-                logger.warning(f"[feedback] ⏰ Timeout waiting for parent result, falling back to LLM")
-                # Fall through to normal processing
-        else:
-            logger.error(f"[feedback] ❌ Redis not available for child miner, falling back to LLM")
-            # Fall through to normal processing
-    
-    # Build previous outputs to analyze
-    outputs_to_analyze = ""
-    if component_input.previous_outputs:
-        outputs_to_analyze = "\n\nOutputs to analyze:\n"
-        for prev in component_input.previous_outputs:
-            # Access Pydantic object attributes
-            outputs_to_analyze += f"\n[{prev.component}] {prev.task}:\n"
-            outputs_to_analyze += f"  Response: {prev.output.immediate_response}\n"
-            if prev.output.notebook and prev.output.notebook != "no update":
-                outputs_to_analyze += f"  Notebook: {prev.output.notebook}\n"
-    
-    # Get conversation history and playbook context
-    conversation_history, playbook_context = await get_context_additions(
-        component_input, context, "feedback"
+    return await _run_component(_SPEC_REFINE, component_input, context)
+
+
+_SYSTEM_PROMPT_FEEDBACK = "You are an AI assistant that provides constructive feedback."
+
+
+def _build_feedback_prompt(component_input: ComponentInput) -> Tuple[str, str]:
+    """Build the feedback prompt and the conversation turn it is stored as."""
+    outputs_to_analyze = _format_previous_outputs(
+        component_input.previous_outputs, "Outputs to analyze:"
     )
-    
-    # Build system prompt
-    system_prompt = "You are an AI assistant that provides constructive feedback."
-    if playbook_context:
-        system_prompt += f"\n{playbook_context}"
-    
-    # Build feedback prompt
     feedback_prompt = f"""Task: {component_input.task}
 {outputs_to_analyze}
 
@@ -759,55 +842,39 @@ For each output, identify:
 3. Specific suggestions for improvement
 
 Format your feedback clearly with sections."""
+    return feedback_prompt, f"Feedback request: {component_input.task}"
+
+
+# Feedback is conversational - plain text reply, no notebook editing
+_SPEC_FEEDBACK = ComponentSpec(
+    name="feedback",
+    system_prompt=_SYSTEM_PROMPT_FEEDBACK,
+    playbook_heading="\n",
+    build_prompt=_build_feedback_prompt,
+    json_output=False
+)
+
+
+async def component_feedback(
+    component_input: ComponentInput,
+    context: ConversationContext
+) -> ComponentOutput:
+    """
+    Feedback component: Analyze outputs and provide structured feedback.
     
-    # Generate feedback
-    response = await generate_response(
-        prompt=feedback_prompt,
-        system_prompt=system_prompt,
-        conversation_history=conversation_history,
-        temperature=0.7
-    )
-    
-    # Store in conversation history
-    await context.add_user_message(f"Feedback request: {component_input.task}")
-    await context.add_assistant_message(response)
+    Supports three miner types:
+    - parent: Analyzes with LLM and stores result in Redis
+    - child: Waits for and fetches result from Redis (no LLM call)
+    - normal: Analyzes with LLM independently (no Redis)
     
-    # PARENT MINER: Store result in Redis for children
-    if miner_type == "parent":
-        logger.info(f"[feedback] Parent miner storing result in Redis...")
-        from src.services.redis_service import get_redis_service
+    Args:
+        component_input: Unified component input with outputs to analyze
+        context: Conversation context
         
-        redis_service = get_redis_service()
-        if redis_service and redis_service.client:
-            result_data = {
-                "immediate_response": response,
-                "notebook": "no update"
-            }
-            
-            success = await redis_service.store_solution(
-                task_hash=task_hash,
-                solution=result_data,
-                ttl=settings.redis_solution_ttl
-            )
-            
-            if success:
-                logger.info(f"[feedback] ✅ Parent stored result in Redis")
-            else:
-                logger.warning(f"[feedback] ⚠️ Failed to store result in Redis")
-        else:
-            logger.warning(f"[feedback] ⚠️ Redis not available for parent miner")
-    
-    # Feedback is conversational - no notebook editing
-    return ComponentOutput(
-        cid=component_input.cid,
-        task=component_input.task,
-        input=component_input.input,
-        output=ComponentOutputData(
-            immediate_response=response,
-            notebook="no update"
-        ),
-        component="feedback"
-    )
+    Returns:
+        ComponentOutput with structured feedback
+    """
+    return await _run_component(_SPEC_FEEDBACK, component_input, context)
 
 
 async def component_human_feedback(
@@ -832,14 +899,7 @@ async def component_human_feedback(
     logger.info(f"[human_feedback] Processing task: {component_input.task}")
     
     # Extract human feedback from input
-    feedback_text_parts = []
-    for item in component_input.input:
-        if item.user_query:
-            feedback_text_parts.append(item.user_query)
-    
-    feedback_text = "\n".join(feedback_text_parts)
-    
-
+    feedback_text = "\n".join([item.user_query for item in component_input.input if item.user_query])
     
     if not feedback_text.strip():
         return ComponentOutput(
@@ -919,8 +979,7 @@ async def component_human_feedback(
         logger.info(f"[human_feedback] Extracted {len(insights)} insights, created/updated {len(entries)} entries")
         
         # Store in conversation history
-        await context.add_user_message(f"User feedback: {feedback_text}")
-        await context.add_assistant_message(message)
+        await context.add_turn(f"User feedback: {feedback_text}", message)
         
         # Create JSON summary of insights for notebook
         notebook_data = {
@@ -930,7 +989,10 @@ async def component_human_feedback(
             "insights": insights
         }
         
-        notebook_json = json.dumps(notebook_data, indent=2)
+        # Feedback text is the bulk of the payload, so it sizes the offload decision
+        notebook_json = await _run_cpu_bound(
+            len(feedback_text), _json_dumps_indented, notebook_data
+        )
         
         return ComponentOutput(
             cid=component_input.cid,
@@ -954,8 +1016,7 @@ async def component_human_feedback(
             f"feedback is stored in conversation history)"
         )
         
-        await context.add_user_message(f"User feedback: {feedback_text}")
-        await context.add_assistant_message(message)
+        await context.add_turn(f"User feedback: {feedback_text}", message)
         
         return ComponentOutput(
             cid=component_input.cid,
@@ -973,14 +1034,37 @@ class GoogleSearchClient:
     """Google Custom Search API client with async support."""
     
     def __init__(self):
-        from src.core.config import settings
         self.base_url = "https://www.googleapis.com/customsearch/v1"
         self.params = {
             "key": settings.google_api_key,
             "cx": settings.google_cx_key,
         }
+        # Precomputed so each request appends to a tuple instead of copying a dict
+        self._param_items = tuple(self.params.items())
+        # Shared HTTP/2 client so parallel searches multiplex over pooled connections;
+        # the transport also retries failed connection attempts
+        self.client = httpx.AsyncClient(
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                retries=3,
+            ),
+        )
+        # Cap in-flight requests so large fan-outs stay under the API's QPS limit
+        self._semaphore = asyncio.Semaphore(settings.google_max_concurrency)
+        self.max_retries = settings.google_max_retries
+        # Recent results keyed on (query, num_results) to save quota on repeats
+        self._cache = TTLCache(maxsize=1024, ttl=settings.google_cache_ttl)
+        # Per-key locks so concurrent identical queries share one upstream call
+        self._locks = KeyedLock()
         logger.info("[internet_search] GoogleSearchClient initialized")
     
+    async def aclose(self):
+        """Close the underlying HTTP client."""
+        await self.client.aclose()
+        logger.info("[internet_search] GoogleSearchClient closed")
+    
     async def asearch(self, query: str, num_results: int = 5) -> List[dict]:
         """
         Perform async Google search.
@@ -992,21 +1076,45 @@ class GoogleSearchClient:
         Returns:
             List of search result dictionaries with 'title', 'url', and 'snippet' keys
         """
+        key = (query, num_results)
+        async with self._locks(key):
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.info(f"[internet_search] Cache hit for query: {query}, num_results: {num_results}")
+                return cached
+            
+            results = await self._fetch(query, num_results)
+            if results is None:
+                return []
+            
+            self._cache.set(key, results)
+            return results
+    
+    async def _fetch(self, query: str, num_results: int) -> Optional[List[dict]]:
+        """
+        Call the Google Custom Search API.
+        
+        Returns:
+            List of search result dictionaries, or None if the request failed
+        """
         logger.info(f"[internet_search] Performing search for query: {query}, num_results: {num_results}")
-        print("params", self.params)
-        params = {**self.params, "q": query, "num": num_results}
+        # Ask for a couple of spare results (the API caps num at 10) so YouTube
+        # links filtered out below don't leave the caller short
+        params = self._param_items + (("q", query), ("num", str(min(num_results + 2, 10))))
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
+        try:
+            response = await self._get_with_backoff(params)
+            response.raise_for_status()
+            if ORJSON_AVAILABLE:
+                search_results = orjson.loads(response.content)
+            else:
                 search_results = response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"[internet_search] HTTP error occurred: {e}")
-                return []
-            except Exception as e:
-                logger.error(f"[internet_search] An error occurred during Google search: {e}")
-                return []
+        except httpx.HTTPStatusError as e:
+            logger.error(f"[internet_search] HTTP error occurred: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"[internet_search] An error occurred during Google search: {e}")
+            return None
         
         items = search_results.get('items', [])
         results = [
@@ -1016,11 +1124,41 @@ class GoogleSearchClient:
                 "snippet": item.get('snippet', '')
             }
             for item in items
-        ]
+            if "youtube.com" not in item.get('link', '')
+        ][:num_results]
         
         logger.info(f"[internet_search] Search completed. Found {len(results)} results.")
         return results
     
+    async def _get_with_backoff(self, params: tuple) -> httpx.Response:
+        """
+        Send a search request, retrying rate-limited (429) and 5xx responses.
+        
+        Args:
+            params: Query parameters for the Custom Search API
+            
+        Returns:
+            The last response received (callers still check its status)
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                response = await self.client.get(self.base_url, params=params)
+            
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt == self.max_retries:
+                break
+            
+            # Back off outside the semaphore so other queries can use the slot
+            delay = 0.5 * (2 ** attempt)
+            logger.warning(
+                f"[internet_search] Got HTTP {response.status_code}, retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+        
+        return response
+    
     async def search_many(self, queries: List[str], num_results: int = 5) -> List[dict]:
         """
         Execute multiple search queries in parallel.
@@ -1032,27 +1170,63 @@ class GoogleSearchClient:
         Returns:
             Combined list of unique search results from all queries
         """
-        logger.info(f"[internet_search] Starting search for {len(queries)} queries, {num_results} results each")
+        # Dedupe queries (case/whitespace-insensitive, order preserved) so each
+        # unique query costs exactly one API call
+        normalized_queries = {}
+        for query in queries:
+            if query and query.strip():
+                normalized_queries.setdefault(query.strip().lower(), query.strip())
+        unique_queries = list(normalized_queries.values())
+        
+        logger.info(f"[internet_search] Starting search for {len(unique_queries)} queries, {num_results} results each")
+        if len(unique_queries) < len(queries):
+            logger.info(f"[internet_search] Skipped {len(queries) - len(unique_queries)} duplicate queries")
         
         # Create tasks for all searches
-        search_tasks = [self.asearch(query, num_results) for query in queries]
-        search_results = await asyncio.gather(*search_tasks)
+        search_tasks = [self.asearch(query, num_results) for query in unique_queries]
+        search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
+        
+        # A failed query should not discard results from the others
+        for results in search_results:
+            if isinstance(results, Exception):
+                logger.warning(f"[internet_search] Search query failed: {results}")
         
-        # Flatten the list of results and remove duplicates by URL
+        # Flatten and remove duplicates by URL in a single pass
         seen_urls = set()
         unique_results = []
         
-        for results in search_results:
-            for result in results:
-                url = result.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_results.append(result)
+        for result in itertools.chain.from_iterable(
+            results for results in search_results if not isinstance(results, Exception)
+        ):
+            url = result.get("url", "")
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                unique_results.append(result)
         
         logger.info(f"[internet_search] Completed search with {len(unique_results)} unique results")
         return unique_results
 
 
+# Global Google search client (created on first use, closed on shutdown)
+_google_search_client: Optional[GoogleSearchClient] = None
+
+
+def get_google_search_client() -> GoogleSearchClient:
+    """Get or create the global Google search client instance."""
+    global _google_search_client
+    if _google_search_client is None:
+        _google_search_client = GoogleSearchClient()
+    return _google_search_client
+
+
+async def close_google_search_client():
+    """Close the global Google search client if it was created."""
+    global _google_search_client
+    if _google_search_client is not None:
+        await _google_search_client.aclose()
+        _google_search_client = None
+
+
 async def component_internet_search(
     component_input: ComponentInput,
     context: ConversationContext
@@ -1070,9 +1244,7 @@ async def component_internet_search(
     logger.info(f"[internet_search] Processing task: {component_input.task}")
     
     # Extract search queries
-    search_queries = []
-    for item in component_input.input:
-        search_queries.append(item.user_query)
+    search_queries = [item.user_query for item in component_input.input]
     
     if not search_queries:
         return ComponentOutput(
@@ -1087,15 +1259,14 @@ async def component_internet_search(
         )
     
     try:
-        from src.core.config import settings
         
         # Check if API keys are configured
         if not settings.google_api_key or not settings.google_cx_key:
             logger.error("[internet_search] Google API keys not configured")
             response = "Google Custom Search API is not configured. Please set GOOGLE_API_KEY and GOOGLE_CX_KEY in .env file."
         else:
-            # Initialize Google Search Client
-            search_client = GoogleSearchClient()
+            # Get shared Google Search Client
+            search_client = get_google_search_client()
             
             # Perform search (use search_many for multiple queries, asearch for single)
             if len(search_queries) == 1:
@@ -1110,10 +1281,6 @@ async def component_internet_search(
                 result_lines = [f"Search results for: {', '.join(search_queries)}\n"]
                 
                 for idx, result in enumerate(results[:7], 1):  # Limit to 7 results
-                    # Skip YouTube results
-                    if "youtube.com" in result.get("url", ""):
-                        continue
-                    
                     title = result.get("title", "No title")
                     url = result.get("url", "")
                     snippet = result.get("snippet", "No description")
@@ -1137,8 +1304,7 @@ async def component_internet_search(
         response = f"Unexpected error during search: {str(e)}"
     
     # Store in conversation history
-    await context.add_user_message(f"Search: {', '.join(search_queries)}")
-    await context.add_assistant_message(response)
+    await context.add_turn(f"Search: {', '.join(search_queries)}", response)
     
     # Internet search is conversational - no notebook editing
     return ComponentOutput(
@@ -1153,6 +1319,24 @@ async def component_internet_search(
     )
 
 
+_SYSTEM_PROMPT_SUMMARY = """You are an AI assistant that creates concise, comprehensive summaries.
+
+CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
+
+Required JSON format:
+{
+  "immediate_response": "Your summary explanation",
+  "notebook": "Summarized notebook content OR 'no update'"
+}
+
+Guidelines for notebook field:
+- If there's NO notebook content in inputs: Return "no update"
+- If there's ONE notebook to summarize: Return the summarized version
+- If there are MULTIPLE notebooks: Create a combined summary
+
+Your response must be ONLY the JSON object, nothing else."""
+
+
 async def component_summary(
     component_input: ComponentInput,
     context: ConversationContext
@@ -1172,9 +1356,6 @@ async def component_summary(
     Returns:
         ComponentOutput with summarized content
     """
-    from src.core.config import settings
-    from src.utils.task_hash import generate_task_hash
-    
     miner_type = settings.miner_type
     logger.info(f"[summary] Processing task as {miner_type} miner: {component_input.task}")
     
@@ -1185,8 +1366,6 @@ async def component_summary(
     # CHILD MINER: Wait for parent's result in Redis
     if miner_type == "child":
         logger.info(f"[summary] Child miner waiting for parent result...")
-        from src.services.redis_service import get_redis_service
-        
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
             # Wait for result from parent
@@ -1217,13 +1396,17 @@ async def component_summary(
     
     # Build content to summarize from previous outputs
     content_to_summarize = []
+    # First previous output with a real notebook, for resolving "no update" later
+    notebook_source = None
     if component_input.previous_outputs:
         for prev in component_input.previous_outputs:
-            # Access Pydantic object attributes
-            output_text = f"[{prev.component}] {prev.task}:\n"
-            output_text += f"Response: {prev.output.immediate_response}\n"
-            if prev.output.notebook and prev.output.notebook != "no update":
-                output_text += f"Notebook: {prev.output.notebook}\n"
+            output = prev.output
+            notebook = output.notebook
+            output_text = f"[{prev.component}] {prev.task}:\nResponse: {output.immediate_response}\n"
+            if notebook and notebook != "no update":
+                output_text += f"Notebook: {notebook}\n"
+                if notebook_source is None:
+                    notebook_source = prev
             content_to_summarize.append(output_text)
     
 
@@ -1248,25 +1431,11 @@ async def component_summary(
     )
     
     # Build system prompt with Canvas-style instructions
-    system_prompt = """You are an AI assistant that creates concise, comprehensive summaries.
-
-CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
-
-Required JSON format:
-{
-  "immediate_response": "Your summary explanation",
-  "notebook": "Summarized notebook content OR 'no update'"
-}
-
-Guidelines for notebook field:
-- If there's NO notebook content in inputs: Return "no update"
-- If there's ONE notebook to summarize: Return the summarized version
-- If there are MULTIPLE notebooks: Create a combined summary
-
-Your response must be ONLY the JSON object, nothing else."""
+    system_prompt = _SYSTEM_PROMPT_SUMMARY
+    system_prompt_suffix = None
     
     if playbook_context:
-        system_prompt += f"\n\nUser preferences:\n{playbook_context}"
+        system_prompt_suffix = f"\n\nUser preferences:\n{playbook_context}"
     
     # Build summary prompt
     summary_prompt = f"""Task: {component_input.task}
@@ -1286,36 +1455,27 @@ Respond in JSON format."""
     response = await generate_response(
         prompt=summary_prompt,
         system_prompt=system_prompt,
+        system_prompt_suffix=system_prompt_suffix,
+        cache_system_prompt=True,
         conversation_history=conversation_history,
         temperature=0.5,
-        response_format={"type": "json_object"}
+        response_format=_json_response_format()
     )
     
     # Parse JSON response
-    immediate_response, notebook_output = parse_json_response(response, "summary")
+    immediate_response, notebook_output = await _run_cpu_bound(
+        len(response), parse_json_response, response, "summary"
+    )
     
     # Resolve "no update" for notebook - return previous notebook if exists
-    if notebook_output == "no update" and component_input.previous_outputs:
-        resolved = False
-        for prev in component_input.previous_outputs:
-            if prev.output.notebook and prev.output.notebook != "no update":
-                notebook_output = prev.output.notebook
-                logger.info(f"[summary] Resolved 'no update' to previous notebook from [{prev.component}]")
-                resolved = True
-                break
-        
-        if not resolved:
-            logger.info(f"[summary] No previous notebook found to resolve - keeping 'no update'")
+    notebook_output = _use_previous_notebook(notebook_output, notebook_source, "summary")
     
     # Store in conversation history
-    await context.add_user_message(f"Summarize: {component_input.task}")
-    await context.add_assistant_message(immediate_response)
+    await context.add_turn(f"Summarize: {component_input.task}", immediate_response)
     
     # PARENT MINER: Store result in Redis for children
     if miner_type == "parent":
         logger.info(f"[summary] Parent miner storing result in Redis...")
-        from src.services.redis_service import get_redis_service
-        
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
             result_data = {
@@ -1323,16 +1483,9 @@ Respond in JSON format."""
                 "notebook": notebook_output
             }
             
-            success = await redis_service.store_solution(
-                task_hash=task_hash,
-                solution=result_data,
-                ttl=settings.redis_solution_ttl
-            )
-            
-            if success:
-                logger.info(f"[summary] ✅ Parent stored result in Redis")
-            else:
-                logger.warning(f"[summary] ⚠️ Failed to store result in Redis")
+            _run_in_background(_store_and_log(
+                redis_service, task_hash, result_data, settings.redis_solution_ttl, "summary"
+            ))
         else:
             logger.warning(f"[summary] ⚠️ Redis not available for parent miner")
     
@@ -1348,6 +1501,25 @@ Respond in JSON format."""
     )
 
 
+_SYSTEM_PROMPT_AGGREGATE = """You are an AI assistant that aggregates multiple outputs using majority voting.
+
+CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
+
+Required JSON format:
+{
+  "immediate_response": "Your explanation of the consensus and voting results",
+  "notebook": "The aggregated/consensus notebook content OR 'no update'"
+}
+
+Guidelines for notebook field:
+- If there's NO notebook content in inputs: Return "no update"
+- If there's ONE notebook: Return it as-is (or "no update" if no changes)
+- If there are MULTIPLE notebooks: Create aggregated version using majority voting
+- Use majority voting: Choose the most common content or merge agreements
+
+Your response must be ONLY the JSON object, nothing else."""
+
+
 async def component_aggregate(
     component_input: ComponentInput,
     context: ConversationContext
@@ -1370,9 +1542,6 @@ async def component_aggregate(
     Returns:
         ComponentOutput with aggregated result
     """
-    from src.core.config import settings
-    from src.utils.task_hash import generate_task_hash
-    
     miner_type = settings.miner_type
     logger.info(f"[aggregate] Processing task as {miner_type} miner: {component_input.task}")
     
@@ -1383,8 +1552,6 @@ async def component_aggregate(
     # CHILD MINER: Wait for parent's result in Redis
     if miner_type == "child":
         logger.info(f"[aggregate] Child miner waiting for parent result...")
-        from src.services.redis_service import get_redis_service
-        
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
             # Wait for result from parent
@@ -1413,28 +1580,18 @@ async def component_aggregate(
             logger.error(f"[aggregate] ❌ Redis not available for child miner, falling back to LLM")
             # Fall through to normal processing
     
-
-    
-    if not component_input.previous_outputs:
-        return ComponentOutput(
-            cid=component_input.cid,
-            task=component_input.task,
-            input=component_input.input,
-            output=ComponentOutputData(
-                immediate_response="No previous outputs to aggregate.",
-                notebook="no update"
-            ),
-            component="aggregate"
-        )
-    
-    # Build outputs for analysis
+    # Build outputs for analysis (the endpoint rejects empty previous_outputs)
     outputs_text = []
+    # First previous output with a real notebook, for resolving "no update" later
+    notebook_source = None
     for idx, prev in enumerate(component_input.previous_outputs, 1):
-        # Access Pydantic object attributes
-        output_text = f"Output {idx} [{prev.component}]:\n"
-        output_text += f"Response: {prev.output.immediate_response}\n"
-        if prev.output.notebook and prev.output.notebook != "no update":
-            output_text += f"Notebook: {prev.output.notebook}\n"
+        output = prev.output
+        notebook = output.notebook
+        output_text = f"Output {idx} [{prev.component}]:\nResponse: {output.immediate_response}\n"
+        if notebook and notebook != "no update":
+            output_text += f"Notebook: {notebook}\n"
+            if notebook_source is None:
+                notebook_source = prev
         outputs_text.append(output_text)
     
     combined_outputs = "\n\n---\n\n".join(outputs_text)
@@ -1445,26 +1602,11 @@ async def component_aggregate(
     )
     
     # Build system prompt with Canvas-style instructions
-    system_prompt = """You are an AI assistant that aggregates multiple outputs using majority voting.
-
-CRITICAL: You MUST respond with ONLY valid JSON. No markdown code blocks, no explanations outside JSON, no extra text.
-
-Required JSON format:
-{
-  "immediate_response": "Your explanation of the consensus and voting results",
-  "notebook": "The aggregated/consensus notebook content OR 'no update'"
-}
-
-Guidelines for notebook field:
-- If there's NO notebook content in inputs: Return "no update"
-- If there's ONE notebook: Return it as-is (or "no update" if no changes)
-- If there are MULTIPLE notebooks: Create aggregated version using majority voting
-- Use majority voting: Choose the most common content or merge agreements
-
-Your response must be ONLY the JSON object, nothing else."""
+    system_prompt = _SYSTEM_PROMPT_AGGREGATE
+    system_prompt_suffix = None
     
     if playbook_context:
-        system_prompt += f"\n\nUser preferences:\n{playbook_context}"
+        system_prompt_suffix = f"\n\nUser preferences:\n{playbook_context}"
     
     # Build aggregate prompt
     aggregate_prompt = f"""Task: {component_input.task}
@@ -1484,36 +1626,27 @@ Respond in JSON format."""
     response = await generate_response(
         prompt=aggregate_prompt,
         system_prompt=system_prompt,
+        system_prompt_suffix=system_prompt_suffix,
+        cache_system_prompt=True,
         conversation_history=conversation_history,
         temperature=0.3,
-        response_format={"type": "json_object"}
+        response_format=_json_response_format()
     )
     
     # Parse JSON response
-    immediate_response, notebook_output = parse_json_response(response, "aggregate")
+    immediate_response, notebook_output = await _run_cpu_bound(
+        len(response), parse_json_response, response, "aggregate"
+    )
     
     # Resolve "no update" for notebook - return previous notebook if exists
-    if notebook_output == "no update" and component_input.previous_outputs:
-        resolved = False
-        for prev in component_input.previous_outputs:
-            if prev.output.notebook and prev.output.notebook != "no update":
-                notebook_output = prev.output.notebook
-                logger.info(f"[aggregate] Resolved 'no update' to previous notebook from [{prev.component}]")
-                resolved = True
-                break
-        
-        if not resolved:
-            logger.info(f"[aggregate] No previous notebook found to resolve - keeping 'no update'")
+    notebook_output = _use_previous_notebook(notebook_output, notebook_source, "aggregate")
     
     # Store in conversation history
-    await context.add_user_message(f"Aggregate: {component_input.task}")
-    await context.add_assistant_message(immediate_response)
+    await context.add_turn(f"Aggregate: {component_input.task}", immediate_response)
     
     # PARENT MINER: Store result in Redis for children
     if miner_type == "parent":
         logger.info(f"[aggregate] Parent miner storing result in Redis...")
-        from src.services.redis_service import get_redis_service
-        
         redis_service = get_redis_service()
         if redis_service and redis_service.client:
             result_data = {
@@ -1521,16 +1654,9 @@ Respond in JSON format."""
                 "notebook": notebook_output
             }
             
-            success = await redis_service.store_solution(
-                task_hash=task_hash,
-                solution=result_data,
-                ttl=settings.redis_solution_ttl
-            )
-            
-            if success:
-                logger.info(f"[aggregate] ✅ Parent stored result in Redis")
-            else:
-                logger.warning(f"[aggregate] ⚠️ Failed to store result in Redis")
+            _run_in_background(_store_and_log(
+                redis_service, task_hash, result_data, settings.redis_solution_ttl, "aggregate"
+            ))
         else:
             logger.warning(f"[aggregate] ⚠️ Redis not available for parent miner")
     
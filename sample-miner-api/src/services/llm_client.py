@@ -11,6 +11,7 @@ The client automatically detects the provider from settings and provides
 a unified interface for all providers.
 """
 
+import asyncio
 import logging
 import re
 import time
@@ -373,8 +374,11 @@ class LLMClient:
         self.provider = settings.llm_provider.lower()
         self.model = settings.get_model_name
         
-        # Configure HTTP client with connection pooling for better performance
+        # Configure HTTP client with connection pooling for better performance;
+        # HTTP/2 lets concurrent completions share one TLS connection when the
+        # endpoint supports it (plain-HTTP endpoints such as local vLLM stay on 1.1)
         http_client = httpx.AsyncClient(
+            http2=True,
             limits=httpx.Limits(
                 max_keepalive_connections=settings.connection_pool_keepalive,
                 max_connections=settings.connection_pool_max,
@@ -419,13 +423,19 @@ class LLMClient:
         elif self.provider == "claude":
             # Claude uses Anthropic API (different from OpenAI)
             self.client = None  # Claude uses httpx directly, not OpenAI client
-            self.http_client = http_client
             self.claude_api_key = settings.anthropic_api_key
             self.claude_base_url = settings.claude_base_url
             logger.info(f"Initialized Claude client at {self.claude_base_url} with model: {self.model} (with connection pooling)")
         
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}. Use 'openai', 'vllm', 'chute', or 'claude'.")
+        
+        # Shared by every provider (the OpenAI SDK clients wrap it) so it can be closed on shutdown
+        self.http_client = http_client
+        
+        # Cap in-flight completions so bursts queue here instead of timing out
+        # waiting for a pooled connection or hammering the provider's rate limit
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
     
     async def generate_response(
         self,
@@ -434,7 +444,9 @@ class LLMClient:
         temperature: Optional[float] = None,
         conversation_history: Optional[List[Dict[str, str]]] = None,
         system_prompt: Optional[str] = None,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, Any]] = None,
+        system_prompt_suffix: Optional[str] = None,
+        cache_system_prompt: bool = False
     ) -> Dict[str, Any]:
         """
         Generate a response using GPT-4o.
@@ -445,7 +457,10 @@ class LLMClient:
             temperature: Sampling temperature
             conversation_history: Previous conversation messages
             system_prompt: Optional system prompt to guide behavior
-            response_format: Optional response format (e.g., {"type": "json_object"})
+            response_format: Optional response format (e.g., {"type": "json_object"} or a json_schema format)
+            system_prompt_suffix: Optional per-request text appended to the system prompt
+            cache_system_prompt: Mark system_prompt as a cacheable prefix (Claude);
+                OpenAI-compatible providers cache identical prefixes automatically
             
         Returns:
             Dictionary containing response and metadata
@@ -457,9 +472,11 @@ class LLMClient:
             # Prepare messages
             messages = []
             
-            # Add system prompt if provided (must be first)
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
+            # Add system prompt if provided (must be first). The suffix goes after
+            # the static part so the shared prefix stays identical across requests
+            full_system_prompt = (system_prompt or "") + (system_prompt_suffix or "")
+            if full_system_prompt:
+                messages.append({"role": "system", "content": full_system_prompt})
             
             # Add conversation history if provided (filter out null/empty messages)
             if conversation_history:
@@ -576,7 +593,27 @@ class LLMClient:
                     "messages": claude_messages
                 }
                 
-                if claude_system:
+                # Claude has no response_format; forcing a call to a tool whose input
+                # schema is the requested JSON schema gives the same guarantee
+                json_schema = None
+                if response_format and response_format.get("type") == "json_schema":
+                    json_schema = response_format["json_schema"]
+                    claude_payload["tools"] = [{
+                        "name": json_schema["name"],
+                        "description": "Return the response in the required structure.",
+                        "input_schema": json_schema["schema"]
+                    }]
+                    claude_payload["tool_choice"] = {"type": "tool", "name": json_schema["name"]}
+                
+                if cache_system_prompt and system_prompt:
+                    # Send the static prompt as its own block with a cache breakpoint
+                    # and the per-request suffix after it, outside the cached prefix
+                    claude_payload["system"] = [
+                        {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                    ]
+                    if system_prompt_suffix:
+                        claude_payload["system"].append({"type": "text", "text": system_prompt_suffix})
+                elif claude_system:
                     claude_payload["system"] = claude_system
                 
                 if temperature is not None:
@@ -586,7 +623,6 @@ class LLMClient:
                 
                 # Make Claude API call
                 logger.info(f"Calling {self.provider.upper()} API with model: {self.model}")
-                start_time = time.perf_counter()
                 
                 claude_url = f"{self.claude_base_url}/messages"
                 claude_headers = {
@@ -595,14 +631,16 @@ class LLMClient:
                     "anthropic-version": "2023-06-01"
                 }
                 
-                claude_response = await self.http_client.post(
-                    claude_url,
-                    headers=claude_headers,
-                    json=claude_payload
-                )
+                async with self._semaphore:
+                    start_time = time.perf_counter()
+                    claude_response = await self.http_client.post(
+                        claude_url,
+                        headers=claude_headers,
+                        json=claude_payload
+                    )
+                    inference_time = time.perf_counter() - start_time
                 claude_response.raise_for_status()
                 claude_data = claude_response.json()
-                inference_time = time.perf_counter() - start_time
                 
                 # Extract response from Claude format
                 # Claude response has content as array: [{"type": "text", "text": "..."}]
@@ -611,6 +649,10 @@ class LLMClient:
                     for content_block in claude_data["content"]:
                         if content_block.get("type") == "text":
                             raw_content += content_block.get("text", "")
+                        elif json_schema and content_block.get("type") == "tool_use":
+                            # Forced tool call: its input is the structured response
+                            raw_content = json.dumps(content_block.get("input", {}))
+                            break
                 
                 # Strip reasoning tags
                 cleaned_content = strip_reasoning_tags(raw_content)
@@ -647,9 +689,10 @@ class LLMClient:
             else:
                 # OpenAI-compatible API call (OpenAI, vLLM, Chute)
                 logger.info(f"Calling {self.provider.upper()} API with model: {self.model}")
-                start_time = time.perf_counter()
-                response = await self.client.chat.completions.create(**params)
-                inference_time = time.perf_counter() - start_time
+                async with self._semaphore:
+                    start_time = time.perf_counter()
+                    response = await self.client.chat.completions.create(**params)
+                    inference_time = time.perf_counter() - start_time
                 
                 # Extract response data
                 message = response.choices[0].message
@@ -755,9 +798,10 @@ class LLMClient:
                 params["temperature"] = temperature if temperature is not None else settings.temperature
             
             # Make API call with timing
-            start_time = time.perf_counter()
-            response = await self.client.chat.completions.create(**params)
-            inference_time = time.perf_counter() - start_time
+            async with self._semaphore:
+                start_time = time.perf_counter()
+                response = await self.client.chat.completions.create(**params)
+                inference_time = time.perf_counter() - start_time
             
             # Extract response data
             message = response.choices[0].message
@@ -932,6 +976,10 @@ class LLMClient:
         except Exception as e:
             logger.error(f"Health check failed: {str(e)}")
             return False
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections."""
+        await self.http_client.aclose()
 
 
 # Global client instance
@@ -943,6 +991,11 @@ def get_llm_client() -> LLMClient:
     return llm_client
 
 
+async def close_llm_client():
+    """Close the global LLM client's HTTP connections."""
+    await llm_client.aclose()
+
+
 # Convenience function for easier imports
 async def generate_response(
     prompt: str,
@@ -951,7 +1004,9 @@ async def generate_response(
     conversation_history: Optional[List[Dict[str, str]]] = None,
     system_prompt: Optional[str] = None,
     user_message: Optional[str] = None,
-    response_format: Optional[Dict[str, str]] = None
+    response_format: Optional[Dict[str, Any]] = None,
+    system_prompt_suffix: Optional[str] = None,
+    cache_system_prompt: bool = False
 ) -> str:
     """
     Convenience function to generate a response using the global client.
@@ -963,7 +1018,9 @@ async def generate_response(
         conversation_history: Previous conversation messages
         system_prompt: Optional system prompt to guide behavior
         user_message: Optional user message (overrides prompt if provided)
-        response_format: Optional response format (e.g., {"type": "json_object"})
+        response_format: Optional response format (e.g., {"type": "json_object"} or a json_schema format)
+        system_prompt_suffix: Optional per-request text appended to the system prompt
+        cache_system_prompt: Mark system_prompt as a cacheable prefix where supported
         
     Returns:
         The generated response text
@@ -974,7 +1031,9 @@ async def generate_response(
         temperature=temperature,
         conversation_history=conversation_history,
         system_prompt=system_prompt,
-        response_format=response_format
+        response_format=response_format,
+        system_prompt_suffix=system_prompt_suffix,
+        cache_system_prompt=cache_system_prompt
     )
     return result["response"]
 
@@ -2,12 +2,12 @@
 
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from src.models.playbook_models import PlaybookEntry, PlaybookOperation
-from src.core.database import engine
-from sqlmodel import Session, select, and_, or_
+from src.core.database import SessionLocal, bulk_insert, run_db, sync_engine_lock
+from sqlmodel import select, and_, or_
 
 logger = logging.getLogger(__name__)
 
@@ -248,9 +248,21 @@ Extract insights now:"""
         Returns:
             List of created/updated playbook entries
         """
+        return await run_db(self._apply_operations, insights, cid, source_feedback, llm_response)
+    
+    def _apply_operations(
+        self,
+        insights: List[Dict[str, Any]],
+        cid: str,
+        source_feedback: str,
+        llm_response: Optional[str]
+    ) -> List[PlaybookEntry]:
+        """Blocking body of apply_operations; runs on the database thread."""
         entries = []
+        # Operation history rows, inserted together before the commit
+        op_logs: List[Dict[str, Any]] = []
         
-        with Session(engine) as session:
+        with sync_engine_lock, SessionLocal() as session:
             # Check current entry count
             current_count = session.exec(
                 select(PlaybookEntry).where(
@@ -275,29 +287,29 @@ Extract insights now:"""
                                 "Consider using 'update' or 'delete' operations instead."
                             )
                             self._log_operation(
-                                session, insight, cid, source_feedback,
+                                op_logs, insight, cid, source_feedback,
                                 operation, False, 
                                 f"Playbook limit reached ({self.MAX_PLAYBOOK_ENTRIES} entries)",
                                 llm_response
                             )
                             continue
                         
-                        entry = await self._insert_entry(session, insight, cid, source_feedback)
+                        entry = self._insert_entry(session, insight, cid, source_feedback)
                         entries.append(entry)
                         active_count += 1
                         
                     elif operation == "update":
-                        entry = await self._update_entry(session, insight, cid, source_feedback)
+                        entry = self._update_entry(session, insight, cid, source_feedback)
                         entries.append(entry)
                         
                     elif operation == "delete":
-                        deleted = await self._delete_entry(session, insight, cid, source_feedback)
+                        deleted = self._delete_entry(session, insight, cid, source_feedback)
                         if deleted:
                             active_count -= 1
                     
                     # Log operation
                     self._log_operation(
-                        session, insight, cid, source_feedback,
+                        op_logs, insight, cid, source_feedback,
                         operation, True, None, llm_response
                     )
                     
@@ -305,10 +317,11 @@ Extract insights now:"""
                     logger.error(f"[PlaybookService] Error applying operation {operation}: {e}")
                     # Log failed operation
                     self._log_operation(
-                        session, insight, cid, source_feedback,
+                        op_logs, insight, cid, source_feedback,
                         operation, False, str(e), llm_response
                     )
             
+            bulk_insert(session, PlaybookOperation, op_logs)
             session.commit()
             
             # Log final count
@@ -316,7 +329,7 @@ Extract insights now:"""
         
         return entries
     
-    async def _insert_entry(
+    def _insert_entry(
         self,
         session,
         insight: Dict[str, Any],
@@ -345,7 +358,7 @@ Extract insights now:"""
         logger.info(f"[PlaybookService] Inserted entry: {entry.key} = {entry.value[:50]}...")
         return entry
     
-    async def _update_entry(
+    def _update_entry(
         self,
         session,
         insight: Dict[str, Any],
@@ -382,9 +395,9 @@ Extract insights now:"""
         else:
             # Insert new if not found
             logger.info(f"[PlaybookService] Entry not found for update, inserting: {insight['key']}")
-            return await self._insert_entry(session, insight, cid, source_feedback)
+            return self._insert_entry(session, insight, cid, source_feedback)
     
-    async def _delete_entry(
+    def _delete_entry(
         self,
         session,
         insight: Dict[str, Any],
@@ -416,7 +429,7 @@ Extract insights now:"""
     
     def _log_operation(
         self,
-        session,
+        op_logs: List[Dict[str, Any]],
         insight: Dict[str, Any],
         cid: str,
         source_feedback: str,
@@ -425,23 +438,17 @@ Extract insights now:"""
         error_message: Optional[str],
         llm_response: Optional[str]
     ):
-        """Log playbook operation to history table."""
-        try:
-            op_log = PlaybookOperation(
-                cid=cid,
-                operation=operation,
-                extracted_data=insight,
-                success=success,
-                error_message=error_message,
-                source_feedback=source_feedback,
-                llm_response=llm_response,
-                timestamp=datetime.utcnow()
-            )
-            
-            session.add(op_log)
-            session.flush()
-        except Exception as e:
-            logger.error(f"[PlaybookService] Error logging operation: {e}")
+        """Queue a playbook operation history row; written by _apply_operations."""
+        op_logs.append({
+            "cid": cid,
+            "operation": operation,
+            "extracted_data": insight,
+            "success": success,
+            "error_message": error_message,
+            "source_feedback": source_feedback,
+            "llm_response": llm_response,
+            "timestamp": datetime.utcnow()
+        })
     
     async def get_playbook(
         self,
@@ -460,7 +467,16 @@ Extract insights now:"""
         Returns:
             List of active playbook entries
         """
-        with Session(engine) as session:
+        return await run_db(self._get_playbook, cid, insight_type, tags)
+    
+    def _get_playbook(
+        self,
+        cid: str,
+        insight_type: Optional[str],
+        tags: Optional[List[str]]
+    ) -> List[PlaybookEntry]:
+        """Blocking body of get_playbook; runs on the database thread."""
+        with sync_engine_lock, SessionLocal() as session:
             statement = select(PlaybookEntry).where(
                 and_(
                     PlaybookEntry.cid == cid,
@@ -479,6 +495,23 @@ Extract insights now:"""
             
             return list(entries)
     
+    async def get_with_formatted(self, cid: str) -> Tuple[List[PlaybookEntry], str]:
+        """
+        Retrieve playbook entries and their formatted context with a single query.
+        
+        Args:
+            cid: Conversation ID
+            
+        Returns:
+            Tuple of (active playbook entries, formatted context string)
+        """
+        entries = await self.get_playbook(cid)
+        if entries:
+            context = self.format_playbook_context(entries)
+        else:
+            context = "No playbook entries found for this conversation."
+        return entries, context
+    
     def format_playbook_context(self, entries: List[PlaybookEntry]) -> str:
         """Format playbook entries as context string for LLM."""
         if not entries:
@@ -1,5 +1,7 @@
 """Utility modules for the miner API."""
 
 from .task_hash import generate_task_hash, generate_simple_hash
+from .cache import TTLCache
+from .locks import KeyedLock
 
-__all__ = ["generate_task_hash", "generate_simple_hash"]
+__all__ = ["generate_task_hash", "generate_simple_hash", "TTLCache", "KeyedLock"]
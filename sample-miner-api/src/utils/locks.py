@@ -0,0 +1,39 @@
+"""Per-key asyncio locks."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, List
+
+
+class KeyedLock:
+    """
+    A set of asyncio locks addressed by key.
+    
+    Callers using the same key run one at a time; different keys don't block
+    each other. A key's lock is dropped once no task holds or waits for it,
+    so the table only grows with the number of keys in use.
+    
+    Not thread-safe: intended for use from a single asyncio event loop.
+    """
+    
+    def __init__(self):
+        # key -> [lock, number of tasks holding or waiting for it]
+        self._locks: Dict[Hashable, List] = {}
+    
+    @asynccontextmanager
+    async def __call__(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold the lock for `key` for the duration of the `async with` block."""
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+    
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,16 @@
+"""Unit tests for the sample miner API.
+
+Run from the sample-miner-api directory:
+
+    python -m unittest discover -s tests -t .
+
+The database settings are read when src.core.database is imported, so a
+throwaway SQLite file is configured here, before any test module imports src.
+"""
+
+import os
+import tempfile
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="miner-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,82 @@
+"""Tests for TTLCache."""
+
+import unittest
+from unittest import mock
+
+from src.utils.cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.utils.cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_get_returns_stored_value(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIn("a", cache)
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.get("missing", "default"), "default")
+    
+    def test_entries_expire_after_ttl(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        self.now += 9.9
+        self.assertEqual(cache.get("a"), 1)
+        self.now += 0.1
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+        # Expired entries are dropped on access
+        self.assertEqual(len(cache), 0)
+    
+    def test_set_restarts_ttl(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        self.now += 8
+        cache.set("a", 2)
+        self.now += 8
+        self.assertEqual(cache.get("a"), 2)
+    
+    def test_full_cache_evicts_oldest_stored_entry(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # Reads don't refresh an entry's position
+        cache.set("c", 3)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+    
+    def test_resetting_a_key_moves_it_to_newest(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 10)
+        cache.set("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.get("a"), 10)
+    
+    def test_pop_and_clear(self):
+        cache = TTLCache(maxsize=4, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.pop("a"))
+        self.assertEqual(cache.pop("a", "default"), "default")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+    
+    def test_falsy_values_are_cached(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("empty", [])
+        self.assertEqual(cache.get("empty", "default"), [])
+        self.assertIn("empty", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
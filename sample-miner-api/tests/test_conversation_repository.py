@@ -0,0 +1,137 @@
+"""Tests for ConversationRepository writes."""
+
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import update
+
+from src.core.database import (
+    async_engine, async_read_engine, create_db_and_tables, get_async_db_session
+)
+from src.models.db_models import Message
+from src.repositories.conversation_repository import ConversationRepository
+
+
+class UpsertConversationTest(unittest.IsolatedAsyncioTestCase):
+    """_upsert_conversation returns the same ID for new and existing CIDs."""
+    
+    @classmethod
+    def setUpClass(cls):
+        create_db_and_tables()
+    
+    async def asyncTearDown(self):
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    
+    async def _upsert(self, cid: str) -> int:
+        repository = ConversationRepository()
+        session = get_async_db_session()
+        try:
+            conversation_id = await repository._upsert_conversation(session, cid)
+            await session.commit()
+            return conversation_id
+        finally:
+            await session.close()
+    
+    async def _assert_upsert(self, cid: str):
+        first = await self._upsert(cid)
+        second = await self._upsert(cid)
+        self.assertEqual(first, second)
+        conversation = await ConversationRepository().get_conversation(cid)
+        self.assertEqual(conversation.id, first)
+        self.assertNotEqual(await self._upsert(cid + "-other"), first)
+    
+    async def test_upsert_with_returning(self):
+        self.assertTrue(async_engine.dialect.insert_returning)
+        await self._assert_upsert("upsert-returning")
+    
+    async def test_upsert_without_returning(self):
+        # SQLite before 3.35 has no RETURNING; SQLAlchemy reports that here
+        with mock.patch.object(async_engine.dialect, "insert_returning", False):
+            await self._assert_upsert("upsert-fallback")
+
+
+class MessageLimitTest(unittest.IsolatedAsyncioTestCase):
+    """add_message/add_messages keep only the newest MAX_MESSAGES messages."""
+    
+    @classmethod
+    def setUpClass(cls):
+        create_db_and_tables()
+    
+    async def asyncSetUp(self):
+        self.repository = ConversationRepository()
+    
+    async def asyncTearDown(self):
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    
+    async def _contents(self, cid: str):
+        messages = await self.repository.get_recent_messages(cid, count=100)
+        return [message["content"] for message in messages]
+    
+    async def test_batch_trims_oldest_to_make_room(self):
+        cid = "limit-batch"
+        limit = ConversationRepository.MAX_MESSAGES
+        for i in range(limit - 1):
+            await self.repository.add_message(cid, "user", f"m{i}")
+        
+        count = await self.repository.add_messages(
+            cid, [("user", "new-user", None), ("assistant", "new-assistant", None)]
+        )
+        
+        self.assertEqual(count, limit)
+        contents = await self._contents(cid)
+        self.assertEqual(contents, [f"m{i}" for i in range(1, limit - 1)] + ["new-user", "new-assistant"])
+        conversation = await self.repository.get_conversation(cid)
+        self.assertEqual(conversation.message_count, limit)
+    
+    async def test_repeated_turns_stay_at_limit_in_order(self):
+        cid = "limit-turns"
+        limit = ConversationRepository.MAX_MESSAGES
+        for i in range(limit):
+            count = await self.repository.add_messages(
+                cid, [("user", f"u{i}", None), ("assistant", f"a{i}", None)]
+            )
+            self.assertLessEqual(count, limit)
+        
+        expected = [f"{role}{i}" for i in range(limit // 2, limit) for role in ("u", "a")]
+        self.assertEqual(await self._contents(cid), expected)
+    
+    async def test_timestamp_ties_break_on_id(self):
+        cid = "limit-ties"
+        limit = ConversationRepository.MAX_MESSAGES
+        for i in range(limit // 2):
+            await self.repository.add_messages(
+                cid, [("user", f"u{i}", None), ("assistant", f"a{i}", None)]
+            )
+        # Same clock tick for every stored message
+        session = get_async_db_session()
+        try:
+            conversation = await self.repository.get_conversation(cid)
+            await session.exec(
+                update(Message)
+                .where(Message.conversation_id == conversation.id)
+                .values(timestamp=datetime.utcnow())
+            )
+            await session.commit()
+        finally:
+            await session.close()
+        
+        expected = [f"{role}{i}" for i in range(limit // 2) for role in ("u", "a")]
+        self.assertEqual(await self._contents(cid), expected)
+        
+        # The trim drops the lowest IDs among the tied messages
+        await self.repository.add_messages(cid, [("user", "u-new", None), ("assistant", "a-new", None)])
+        self.assertEqual(await self._contents(cid), expected[2:] + ["u-new", "a-new"])
+    
+    async def test_single_message_trims_one(self):
+        cid = "limit-single"
+        limit = ConversationRepository.MAX_MESSAGES
+        for i in range(limit + 3):
+            await self.repository.add_message(cid, "user", f"m{i}")
+        self.assertEqual(await self._contents(cid), [f"m{i}" for i in range(3, limit + 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for GoogleSearchClient query/URL dedupe and retry handling."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from src.services.components import GoogleSearchClient
+
+# Kept unpatched so the fake transport can yield while backoff sleeps are mocked
+_real_sleep = asyncio.sleep
+
+
+def _item(url: str, title: str = "title") -> dict:
+    return {"title": title, "link": url, "snippet": "snippet"}
+
+
+class GoogleSearchClientTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self.requests = []
+        self.responses = {}  # query -> list of items
+        self.statuses = []  # status codes to return before succeeding
+        self.search_client = GoogleSearchClient()
+        await self.search_client.aclose()
+        self.search_client.client = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+        # Retry backoff would otherwise sleep for real
+        sleep = mock.patch("src.services.components.asyncio.sleep", new=mock.AsyncMock())
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+    
+    async def asyncTearDown(self):
+        await self.search_client.aclose()
+    
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        query = request.url.params["q"]
+        self.requests.append(query)
+        # Give concurrent callers for the same key a chance to pile up
+        await _real_sleep(0)
+        if self.statuses:
+            return httpx.Response(self.statuses.pop(0))
+        return httpx.Response(200, json={"items": self.responses.get(query, [])})
+    
+    async def test_search_many_dedupes_queries(self):
+        self.responses = {"python": [_item("https://a")], "Rust lang": [_item("https://b")]}
+        
+        results = await self.search_client.search_many(
+            ["python", " Python ", "PYTHON", "", "   ", "Rust lang", "rust LANG"]
+        )
+        
+        self.assertEqual(sorted(self.requests), ["Rust lang", "python"])
+        self.assertEqual([r["url"] for r in results], ["https://a", "https://b"])
+    
+    async def test_search_many_dedupes_urls_across_queries(self):
+        self.responses = {
+            "q1": [_item("https://a", "first"), _item("https://b"), _item("")],
+            "q2": [_item("https://b"), _item("https://a", "second"), _item("https://c")],
+        }
+        
+        results = await self.search_client.search_many(["q1", "q2"])
+        
+        self.assertEqual([r["url"] for r in results], ["https://a", "https://b", "https://c"])
+        # The first occurrence wins
+        self.assertEqual(results[0]["title"], "first")
+    
+    async def test_youtube_results_are_dropped(self):
+        self.responses = {"q": [_item("https://www.youtube.com/watch?v=1"), _item("https://a")]}
+        
+        results = await self.search_client.asearch("q", num_results=5)
+        
+        self.assertEqual([r["url"] for r in results], ["https://a"])
+    
+    async def test_concurrent_identical_searches_share_one_request(self):
+        self.responses = {"q": [_item("https://a")]}
+        
+        results = await asyncio.gather(*(self.search_client.asearch("q", 5) for _ in range(5)))
+        
+        self.assertEqual(self.requests, ["q"])
+        self.assertTrue(all(r == [{"title": "title", "url": "https://a", "snippet": "snippet"}] for r in results))
+        # Repeats within the TTL come from the cache
+        await self.search_client.asearch("q", 5)
+        self.assertEqual(self.requests, ["q"])
+    
+    async def test_retries_rate_limited_and_server_errors(self):
+        self.responses = {"q": [_item("https://a")]}
+        self.statuses = [429, 503]
+        
+        results = await self.search_client.asearch("q", 5)
+        
+        self.assertEqual([r["url"] for r in results], ["https://a"])
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual([call.args[0] for call in self.sleep.await_args_list], [0.5, 1.0])
+    
+    async def test_gives_up_after_max_retries(self):
+        self.search_client.max_retries = 2
+        self.statuses = [429, 429, 429, 429]
+        
+        results = await self.search_client.asearch("q", 5)
+        
+        self.assertEqual(results, [])
+        self.assertEqual(len(self.requests), 3)
+        # Failures are not cached
+        self.statuses = []
+        self.responses = {"q": [_item("https://a")]}
+        self.assertEqual(len(await self.search_client.asearch("q", 5)), 1)
+    
+    async def test_client_errors_are_not_retried(self):
+        self.statuses = [403]
+        
+        self.assertEqual(await self.search_client.asearch("q", 5), [])
+        self.assertEqual(len(self.requests), 1)
+        self.sleep.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Tests for KeyedLock."""
+
+import asyncio
+import unittest
+
+from src.utils.locks import KeyedLock
+
+
+class KeyedLockTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def test_same_key_runs_one_at_a_time(self):
+        locks = KeyedLock()
+        active = 0
+        max_active = 0
+        
+        async def worker():
+            nonlocal active, max_active
+            async with locks("k"):
+                active += 1
+                max_active = max(max_active, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+        
+        await asyncio.gather(*(worker() for _ in range(5)))
+        self.assertEqual(max_active, 1)
+        self.assertEqual(len(locks), 0)
+    
+    async def test_different_keys_do_not_block_each_other(self):
+        locks = KeyedLock()
+        entered = asyncio.Event()
+        
+        async def holder():
+            async with locks("a"):
+                await asyncio.wait_for(entered.wait(), timeout=1)
+        
+        async def other():
+            async with locks("b"):
+                entered.set()
+        
+        await asyncio.gather(holder(), other())
+        self.assertEqual(len(locks), 0)
+    
+    async def test_lock_kept_while_a_waiter_is_queued(self):
+        locks = KeyedLock()
+        order = []
+        release = asyncio.Event()
+        
+        async def holder():
+            async with locks("k"):
+                order.append("holder")
+                await release.wait()
+        
+        async def waiter():
+            async with locks("k"):
+                order.append("waiter")
+                # The holder has released, but the entry must survive for us
+                self.assertEqual(len(locks), 1)
+                # A new caller now has to queue behind this one, not get a fresh lock
+                late = asyncio.create_task(late_caller())
+                await asyncio.sleep(0)
+                self.assertEqual(order, ["holder", "waiter"])
+            await late
+        
+        async def late_caller():
+            async with locks("k"):
+                order.append("late")
+        
+        holder_task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter_task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        self.assertEqual(len(locks), 1)
+        
+        release.set()
+        await asyncio.gather(holder_task, waiter_task)
+        self.assertEqual(order, ["holder", "waiter", "late"])
+        self.assertEqual(len(locks), 0)
+    
+    async def test_lock_released_when_body_raises(self):
+        locks = KeyedLock()
+        with self.assertRaises(RuntimeError):
+            async with locks("k"):
+                raise RuntimeError("boom")
+        self.assertEqual(len(locks), 0)
+        async with locks("k"):
+            pass
+    
+    async def test_cancelled_waiter_is_cleaned_up(self):
+        locks = KeyedLock()
+        release = asyncio.Event()
+        
+        async def holder():
+            async with locks("k"):
+                await release.wait()
+        
+        async def waiter():
+            async with locks("k"):
+                pass
+        
+        holder_task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter_task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        waiter_task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter_task
+        
+        release.set()
+        await holder_task
+        self.assertEqual(len(locks), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()